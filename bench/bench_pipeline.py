@@ -0,0 +1,208 @@
+"""End-to-end enforcement benchmark: LJSON tailer -> pipeline -> user DB / ban.txt -> Discord.
+
+    python bench/bench_pipeline.py --mode replay --lines 200000 --rotate-every 50000
+    python bench/bench_pipeline.py --mode live --rate 2000 --duration 20 --json --out results.json
+
+Drives the real LogWatcher, DeathEventPipeline, the bot's DeathEnforcer,
+UserService, BanlistService and DiscordActionScheduler against synthetic logs (bench/ljson_gen.py) and an
+in-process Discord stand-in with latency and rate limits (bench/fake_discord.py).
+``replay`` pre-writes the whole backlog and measures catch-up throughput; ``live``
+appends at ``--rate`` lines/sec and measures steady-state latency. Runs offline.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from bot.action_scheduler import DiscordActionScheduler  # noqa: E402
+from bot.death_enforcer import DeathEnforcer  # noqa: E402
+from bot.member_resolver import MemberResolver  # noqa: E402
+from bench_util import peak_rss_mb, percentiles, wait_until  # noqa: E402
+from fake_discord import FakeApi, FakeClient, FakeGuild, FakeMessageable  # noqa: E402
+from ljson_gen import LjsonGenerator, log_name  # noqa: E402
+from models.user import iso_to_epoch  # noqa: E402
+from models.cache import CacheState  # noqa: E402
+from services.banlist_service import BanlistService  # noqa: E402
+from services.death_pipeline import DeathEventPipeline  # noqa: E402
+from services.user_service import UserService  # noqa: E402
+from watchers.event_dedupe import ProcessedEventIndex  # noqa: E402
+from watchers.log_watcher import LogWatcher  # noqa: E402
+
+GUILD_ID = 1
+ALIVE_ROLE_ID = 10
+DEAD_ROLE_ID = 11
+FIRST_DISCORD_ID = 100000000000000000
+
+
+async def run(args: argparse.Namespace, tmp: Path) -> dict:
+    gen = LjsonGenerator(tmp / "logs", args.players, args.death_ratio, args.rotate_every, args.seed)
+    users = UserService(tmp / "users.json", write_window=args.write_window_ms / 1000)
+    for i, steam64 in enumerate(gen.steam64s()):
+        users.mark_validated(steam64, FIRST_DISCORD_ID + i)
+    users.save()
+    await users.flush()
+    bans = BanlistService(tmp / "ban.txt", tmp / "whitelist.txt", write_window=args.write_window_ms / 1000)
+    writes_before = (users._writer.write_count, bans._ban_writer.write_count, bans._whitelist_writer.write_count)
+
+    api = FakeApi(args.discord_latency_ms, args.discord_jitter_ms, args.discord_rate_limit, args.discord_rate_window, args.seed)
+    guild = FakeGuild(api, [ALIVE_ROLE_ID, DEAD_ROLE_ID])
+    for i in range(args.players):
+        guild.add_member(FIRST_DISCORD_ID + i, [ALIVE_ROLE_ID])
+    members = MemberResolver(FakeClient(GUILD_ID, guild), GUILD_ID)
+    spam = FakeMessageable(FakeApi(args.discord_latency_ms, 0, 0, 1, args.seed))
+    actions = DiscordActionScheduler(
+        lambda: spam,
+        coalesce_delay=args.coalesce_ms / 1000,
+        actions_per_second=args.actions_per_second,
+        digest_interval=1.0,
+    )
+
+    latency: Dict[str, List[float]] = {"ban_written": [], "discord": []}
+
+    def on_stage(payload: dict, stage: str) -> None:
+        # Measured from the LJSON timestamp, i.e. as a player would see it.
+        logged_at = iso_to_epoch(payload.get("ts"))
+        if stage in latency and logged_at is not None:
+            latency[stage].append(max(0.0, time.time() - logged_at))
+
+    # The bot's own handler; the bench ban list has no RCon, so the kick is a no-op.
+    enforcer = DeathEnforcer(users, bans, actions, members, 3, DEAD_ROLE_ID, ALIVE_ROLE_ID, on_stage=on_stage)
+    discord_latency = latency["discord"]
+
+    # A fresh cursor would start at the newest file; point it at the first one so a
+    # rotated backlog is replayed in full.
+    cache_path = tmp / "cache.json"
+    cache_path.write_text(json.dumps(CacheState(activeLogFile=log_name(0)).to_dict()))
+    pipeline = DeathEventPipeline(enforcer, workers=args.workers, max_pending=args.queue_size)
+    watcher = LogWatcher(
+        gen.logs_dir,
+        cache_path,
+        pipeline.submit,
+        dedupe=ProcessedEventIndex(tmp / "cache.processed"),
+        checkpoint_interval=args.checkpoint_seconds,
+        checkpoint_events=args.checkpoint_events,
+        name="bench",
+    )
+
+    if args.mode == "replay":
+        gen.write(args.lines)
+    actions.start()
+    pipeline.start()
+    started = time.perf_counter()
+    watcher_task = asyncio.create_task(watcher.run())
+    if args.mode == "live":
+        await gen.stream(args.rate, args.duration)
+    caught_up = await wait_until(lambda: watcher.lines_parsed >= gen.lines_written, args.timeout)
+    parse_elapsed = time.perf_counter() - started
+    await pipeline.join()
+    await bans.flush()
+    await users.flush()
+    drained = await wait_until(lambda: len(discord_latency) >= enforcer.role_swaps_requested, args.drain_timeout)
+    total_elapsed = time.perf_counter() - started
+    discord_pending = enforcer.role_swaps_requested - len(discord_latency)
+    if not drained:
+        # Whatever is still queued is outside the measurement; let stop() flush it fast.
+        api.latency = api.jitter = 0.0
+        api.rate_limit = 0
+        actions.min_interval = 0.0
+
+    watcher.running = False
+    watcher_task.cancel()
+    await asyncio.gather(watcher_task, return_exceptions=True)
+    await pipeline.stop()
+    await actions.stop()
+    await users.close()
+
+    stats = actions.stats()
+    return {
+        "mode": args.mode,
+        "config": {
+            k: v for k, v in vars(args).items() if k not in ("json", "out")
+        },
+        "python": platform.python_version(),
+        "caught_up": caught_up,
+        "actions_drained": drained,
+        "lines": gen.lines_written,
+        "log_files": gen.file_index + 1,
+        "bytes_read": watcher.bytes_read,
+        "deaths_written": gen.deaths_written,
+        "deaths_handled": enforcer.deaths_enforced,
+        "duplicates_skipped": watcher.dedupe.duplicates_skipped,
+        "parse_seconds": round(parse_elapsed, 3),
+        "total_seconds": round(total_elapsed, 3),
+        "lines_per_sec": round(watcher.lines_parsed / parse_elapsed, 1) if parse_elapsed else None,
+        "mb_per_sec": round(watcher.bytes_read / parse_elapsed / 1e6, 2) if parse_elapsed else None,
+        "death_to_ban_ms": percentiles(latency["ban_written"]),
+        "death_to_discord_ms": percentiles(discord_latency),
+        "peak_rss_mb": peak_rss_mb(),
+        "writes": {
+            "users_json": users._writer.write_count - writes_before[0],
+            "ban_txt": bans._ban_writer.write_count - writes_before[1],
+            "whitelist_txt": bans._whitelist_writer.write_count - writes_before[2],
+            "cursor_checkpoints": watcher.checkpoint_count,
+        },
+        "discord": {
+            "api_calls": api.calls,
+            "rate_limited": api.rate_limited,
+            "edits_sent": stats.get("edits_sent"),
+            "actions_merged": stats.get("actions_merged"),
+            "pacing_wait_seconds": round(stats.get("pacing_wait_seconds", 0.0), 2),
+            "edits_pending_at_timeout": discord_pending,
+            "digest_messages": len(spam.messages),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("replay", "live"), default="replay")
+    parser.add_argument("--lines", type=int, default=100_000, help="replay: backlog size")
+    parser.add_argument("--rate", type=float, default=1000.0, help="live: lines per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="live: seconds to generate for")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--death-ratio", type=float, default=0.002)
+    parser.add_argument("--rotate-every", type=int, default=0, help="start a new dl_*.ljson every N lines")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=256)
+    parser.add_argument("--write-window-ms", type=float, default=250)
+    parser.add_argument("--checkpoint-seconds", type=float, default=30.0)
+    parser.add_argument("--checkpoint-events", type=int, default=5000)
+    parser.add_argument("--coalesce-ms", type=float, default=500)
+    parser.add_argument("--actions-per-second", type=float, default=5.0)
+    parser.add_argument("--discord-latency-ms", type=float, default=80.0)
+    parser.add_argument("--discord-jitter-ms", type=float, default=30.0)
+    parser.add_argument("--discord-rate-limit", type=int, default=10, help="edits per window before 429 (0: none)")
+    parser.add_argument("--discord-rate-window", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="max seconds to wait for the tailer to catch up")
+    parser.add_argument("--drain-timeout", type=float, default=60.0, help="max seconds to wait for Discord edits")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--out", type=Path, help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run(args, Path(tmp)))
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(results))
+        return
+    for key, value in results.items():
+        if key != "config":
+            print(f"{key:<20}  {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Death-to-kick latency through BattlEye RCon against the local fake server.
+
+    python bench/bench_rcon.py --deaths 500 --players 1000 --latency-ms 5
+    python bench/bench_rcon.py --drop-ratio 0.05 --json --out rcon.json
+
+Runs the real BanlistService with an RconBanDelivery against bench/fake_rcon.py.
+Each death bans and kicks one online player, the same way
+DeathEnforcer does in the bot. Half of the banned players are unbanned
+afterwards. The report covers death-to-kick latency, as seen by the server and
+as confirmed to the bot, next to death-to-ban.txt latency. It also checks that
+the server's ban list ends up matching ban.txt. Runs offline.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from adapters.battleye_rcon import BattlEyeRconClient, be_guid  # noqa: E402
+from bench_util import percentiles, wait_until  # noqa: E402
+from fake_rcon import FakeRconServer  # noqa: E402
+from ljson_gen import FIRST_STEAM64  # noqa: E402
+from services.banlist_service import BanlistService  # noqa: E402
+from services.rcon_delivery import RconBanDelivery  # noqa: E402
+
+PASSWORD = "bench"
+
+
+async def run(args: argparse.Namespace, tmp: Path) -> dict:
+    server = FakeRconServer(PASSWORD, args.latency_ms, args.drop_ratio, args.seed)
+    await server.start()
+    steam64s = [str(FIRST_STEAM64 + i) for i in range(args.players)]
+    for steam64 in steam64s:
+        server.add_player(steam64)
+
+    client = BattlEyeRconClient("127.0.0.1", server.port, PASSWORD, timeout=args.timeout_ms / 1000)
+    delivery = RconBanDelivery(client, batch_window=args.batch_ms / 1000, name="bench")
+    bans = BanlistService(tmp / "ban.txt", tmp / "whitelist.txt", args.write_window_ms / 1000, rcon=delivery)
+    bans.start()
+
+    rng = random.Random(args.seed)
+    victims = rng.sample(steam64s, min(args.deaths, len(steam64s)))
+    died_at: Dict[str, float] = {}
+    kick_confirmed: List[float] = []
+    ban_written: List[float] = []
+
+    def since(started: float, samples: List[float]):
+        return lambda: samples.append(time.time() - started)
+
+    started = time.perf_counter()
+    for steam64 in victims:
+        now = died_at[steam64] = time.time()
+        bans.add_ban(steam64, on_written=since(now, ban_written))
+        bans.kick(steam64, on_done=since(now, kick_confirmed))
+        await asyncio.sleep(args.interval_ms / 1000)
+    all_kicked = await wait_until(lambda: len(kick_confirmed) >= len(victims), args.drain_timeout)
+    await bans.flush()
+    kick_seconds = time.perf_counter() - started
+
+    revived = victims[: len(victims) // 2]
+    for steam64 in revived:
+        bans.remove_ban(steam64)
+    expected = {be_guid(s) for s in victims[len(victims) // 2:]}
+    converged = await wait_until(
+        lambda: set(server.banned_guids()) == expected and not delivery.queue_depth, args.drain_timeout
+    )
+    await bans.close()
+    server.close()
+
+    server_kick = [server.kicked[s] - died_at[s] for s in victims if s in server.kicked]
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "out")},
+        "python": platform.python_version(),
+        "deaths": len(victims),
+        "all_kicked": all_kicked,
+        "bans_converged": converged,
+        "kick_seconds": round(kick_seconds, 3),
+        "death_to_kick_server_ms": percentiles(server_kick),
+        "death_to_kick_confirmed_ms": percentiles(kick_confirmed),
+        "death_to_ban_txt_ms": percentiles(ban_written),
+        "rcon": {
+            **delivery.stats(),
+            "commands": len(server.commands),
+            "ban_writes": server.ban_writes,
+            "packets_dropped": server.dropped,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deaths", type=int, default=200)
+    parser.add_argument("--players", type=int, default=500, help="players online on the fake server")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="time between deaths")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="fake server reply delay")
+    parser.add_argument("--drop-ratio", type=float, default=0.0, help="share of client packets the server drops")
+    parser.add_argument("--batch-ms", type=float, default=50.0)
+    parser.add_argument("--timeout-ms", type=float, default=500.0, help="RCon reply timeout per attempt")
+    parser.add_argument("--write-window-ms", type=float, default=250)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--out", type=Path, help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run(args, Path(tmp)))
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(results))
+        return
+    for key, value in results.items():
+        if key != "config":
+            print(f"{key:<28}  {value}")
+
+
+if __name__ == "__main__":
+    main()
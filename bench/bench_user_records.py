@@ -0,0 +1,122 @@
+"""Memory per user and startup load time: users.json vs the binary snapshot.
+
+    python bench/bench_user_records.py --users 100000
+
+The "legacy" baseline is the previous UserRecord shape (plain dataclass, ISO strings).
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from models.user import UserRecord, epoch_to_iso  # noqa: E402
+from models.user_snapshot import dump_users, load_users  # noqa: E402
+
+
+@dataclass
+class LegacyUserRecord:
+    steam64: str
+    discordId: int
+    validatedAt: Optional[str] = None
+    isDead: bool = False
+    deadUntil: Optional[str] = None
+    lastAliveSec: Optional[int] = None
+    lastDeathAt: Optional[str] = None
+    privateVcId: Optional[int] = None
+    lastVoiceState: Optional[str] = None
+
+
+def make_payload(count: int, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    now = int(time.time())
+    payload = {}
+    for i in range(count):
+        steam64 = str(76561198000000000 + i)
+        dead = rng.random() < 0.1
+        record = UserRecord(
+            steam64=steam64,
+            discordId=100000000000000000 + i,
+            validatedAtTs=now - rng.randrange(86400 * 90),
+            isDead=dead,
+            deadUntilTs=now + rng.randrange(86400 * 3) if dead else None,
+            lastAliveSec=rng.randrange(60, 86400 * 7),
+            lastDeathAt=epoch_to_iso(now - rng.randrange(86400 * 30)),
+            privateVcId=1100000000000000000 + i if rng.random() < 0.05 else None,
+        )
+        payload[steam64] = record.to_dict()
+    return payload
+
+
+def measure_memory(factory, text: str) -> float:
+    # Retained bytes per user after a full load from JSON text, with the parsed
+    # payload dropped so only what the records themselves keep alive is counted.
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    payload = json.loads(text)
+    users = {k: factory(v) for k, v in payload.items()}
+    del payload
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    count = len(users)
+    del users
+    return (after - before) / max(count, 1)
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    payload = make_payload(args.users)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "users.json"
+        snapshot_path = Path(tmp) / "users.snapshot"
+        json_path.write_text(json.dumps(payload, indent=2))
+        snapshot_path.write_bytes(dump_users(UserRecord.from_dict(v) for v in payload.values()))
+
+        results = {
+            "users": args.users,
+            "bytes_per_user_legacy": round(measure_memory(lambda d: LegacyUserRecord(**d), json_path.read_text()), 1),
+            "bytes_per_user_compact": round(measure_memory(UserRecord.from_dict, json_path.read_text()), 1),
+            "json_file_bytes": json_path.stat().st_size,
+            "snapshot_file_bytes": snapshot_path.stat().st_size,
+            "json_load_seconds": round(
+                best_of(lambda: {k: UserRecord.from_dict(v) for k, v in json.loads(json_path.read_text()).items()}), 4
+            ),
+            "snapshot_load_seconds": round(best_of(lambda: load_users(snapshot_path.read_bytes())), 4),
+        }
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    width = max(len(k) for k in results)
+    for key, value in results.items():
+        print(f"{key:<{width}}  {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""In-process stand-in for the parts of discord.py the enforcement path touches.
+
+Members, roles and a guild are plain objects; ``FakeMember.edit`` sleeps for a
+simulated round trip. Once more than ``rate_limit`` edits land inside
+``rate_window`` seconds, like the member route bucket allows, the call waits the
+bucket out the way discord.py does for a 429 by default (``rate_limited`` counts
+them). Nothing here opens a network connection.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+import discord
+
+
+class FakeApi:
+    def __init__(
+        self,
+        latency_ms: float = 80.0,
+        jitter_ms: float = 30.0,
+        rate_limit: int = 10,
+        rate_window: float = 10.0,
+        seed: int = 1,
+    ) -> None:
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rng = random.Random(seed)
+        self._recent: Deque[float] = deque()
+        self.calls = 0
+        self.rate_limited = 0
+        self.latencies: List[float] = []
+
+    async def call(self) -> None:
+        while True:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= self.rate_window:
+                self._recent.popleft()
+            if not self.rate_limit or len(self._recent) < self.rate_limit:
+                break
+            self.rate_limited += 1
+            await asyncio.sleep(self.rate_window - (now - self._recent[0]))
+        self._recent.append(now)
+        delay = max(0.0, self.rng.gauss(self.latency, self.jitter))
+        await asyncio.sleep(delay)
+        self.calls += 1
+        self.latencies.append(delay)
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str = "") -> None:
+        self.id = role_id
+        self.name = name or str(role_id)
+
+    def is_default(self) -> bool:
+        return False
+
+
+class FakeVoiceState:
+    def __init__(self, channel) -> None:
+        self.channel = channel
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", member_id: int, roles: Iterable[FakeRole] = ()) -> None:
+        self.guild = guild
+        self.id = member_id
+        self.roles: List[FakeRole] = list(roles)
+        self.voice: Optional[FakeVoiceState] = None
+        self.mention = f"<@{member_id}>"
+        self.edits = 0
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return next((r for r in self.roles if r.id == role_id), None)
+
+    async def edit(self, *, reason: Optional[str] = None, roles=None, voice_channel=discord.utils.MISSING) -> None:
+        await self.guild.api.call()
+        if roles is not None:
+            self.roles = list(roles)
+        if voice_channel is None:
+            self.voice = None
+        self.edits += 1
+
+
+class FakeGuild:
+    def __init__(self, api: FakeApi, role_ids: Iterable[int]) -> None:
+        self.api = api
+        self.chunked = True
+        self._roles: Dict[int, FakeRole] = {rid: FakeRole(rid) for rid in role_ids}
+        self._members: Dict[int, FakeMember] = {}
+
+    def add_member(self, member_id: int, role_ids: Iterable[int] = ()) -> FakeMember:
+        member = FakeMember(self, member_id, [self._roles[r] for r in role_ids])
+        self._members[member_id] = member
+        return member
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members.get(member_id)
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self._roles.get(role_id)
+
+    @property
+    def members(self) -> List[FakeMember]:
+        return list(self._members.values())
+
+
+class FakeMessageable:
+    def __init__(self, api: FakeApi) -> None:
+        self.api = api
+        self.messages: List[str] = []
+
+    async def send(self, content: str) -> None:
+        await self.api.call()
+        self.messages.append(content)
+
+
+class FakeClient:
+    """Just enough of ``discord.Client`` for MemberResolver."""
+
+    def __init__(self, guild_id: int, guild: FakeGuild) -> None:
+        self.guild_id = guild_id
+        self.guild = guild
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self.guild if guild_id == self.guild_id else None
+
+    async def fetch_guild(self, guild_id: int) -> FakeGuild:
+        raise discord.NotFound(_FakeResponse(404), "Unknown Guild")
+
+
+class _FakeResponse:
+    def __init__(self, status: int) -> None:
+        self.status = status
+        self.reason = "Not Found"
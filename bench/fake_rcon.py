@@ -0,0 +1,147 @@
+"""Local BattlEye RCon stand-in for offline tests and benchmarks.
+
+Speaks the UDP protocol the real server does (login, sequenced commands with
+multipart replies, keepalives) and implements the commands the ban delivery uses:
+``players``, ``kick``, ``bans``, ``addBan``, ``removeBan`` and ``writeBans``.
+Imports from ``src/``, so put it on ``sys.path`` first as the bench scripts do.
+Replies can be delayed by ``latency_ms`` and a share of incoming packets dropped
+with ``drop_ratio`` to exercise retransmits. Every kick is timestamped.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from adapters.battleye_rcon import (
+    COMMAND,
+    LOGIN,
+    SERVER_MESSAGE,
+    RconError,
+    be_guid,
+    decode_packet,
+    encode_packet,
+)
+
+# Real servers split replies well below the UDP limit; a small size forces multipart.
+MAX_PART_BYTES = 1024
+
+
+@dataclass
+class FakePlayer:
+    number: int
+    steam64: str
+    name: str
+
+    @property
+    def guid(self) -> str:
+        return be_guid(self.steam64)
+
+
+class FakeRconServer(asyncio.DatagramProtocol):
+    def __init__(self, password: str = "secret", latency_ms: float = 0.0, drop_ratio: float = 0.0, seed: int = 1) -> None:
+        self.password = password
+        self.latency = latency_ms / 1000
+        self.drop_ratio = drop_ratio
+        self.rng = random.Random(seed)
+        self.players: Dict[str, FakePlayer] = {}
+        self.bans: List[Tuple[str, str]] = []
+        self.kicked: Dict[str, float] = {}
+        self.commands: List[str] = []
+        self.keepalives = 0
+        self.ban_writes = 0
+        self.dropped = 0
+        self._authed: set = set()
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self.port = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(lambda: self, local_addr=(host, port))
+        self.port = self._transport.get_extra_info("sockname")[1]
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def add_player(self, steam64: str, name: str = "") -> FakePlayer:
+        player = FakePlayer(len(self.players), steam64, name or f"Survivor{steam64[-4:]}")
+        self.players[player.guid] = player
+        return player
+
+    def broadcast(self, text: str, seq: int = 0) -> None:
+        for addr in self._authed:
+            self._transport.sendto(encode_packet(SERVER_MESSAGE, bytes((seq,)) + text.encode()), addr)
+
+    def banned_guids(self) -> List[str]:
+        return [guid for guid, _ in self.bans]
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if self.drop_ratio and self.rng.random() < self.drop_ratio:
+            self.dropped += 1
+            return
+        try:
+            kind, payload = decode_packet(data)
+        except RconError:
+            return
+        if kind == LOGIN:
+            ok = payload.decode() == self.password
+            if ok:
+                self._authed.add(addr)
+            self._reply(addr, encode_packet(LOGIN, b"\x01" if ok else b"\x00"))
+        elif kind == COMMAND and payload and addr in self._authed:
+            seq, text = payload[0], payload[1:].decode()
+            if not text:
+                self.keepalives += 1
+            body = self._run(text).encode() if text else b""
+            if len(body) <= MAX_PART_BYTES:
+                self._reply(addr, encode_packet(COMMAND, bytes((seq,)) + body))
+                return
+            parts = [body[i:i + MAX_PART_BYTES] for i in range(0, len(body), MAX_PART_BYTES)]
+            for index, part in enumerate(parts):
+                self._reply(addr, encode_packet(COMMAND, bytes((seq, 0x00, len(parts), index)) + part))
+
+    def _reply(self, addr, packet: bytes) -> None:
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self._transport.sendto, packet, addr)
+        else:
+            self._transport.sendto(packet, addr)
+
+    def _run(self, text: str) -> str:
+        self.commands.append(text)
+        verb, _, args = text.partition(" ")
+        if verb == "players":
+            lines = ["Players on server:", "[#] [IP Address]:[Port] [Ping] [GUID] [Name]", "-" * 50]
+            for p in self.players.values():
+                lines.append(f"{p.number:<4}127.0.0.1:{2304 + p.number:<6}42   {p.guid}(OK) {p.name}")
+            lines.append(f"({len(self.players)} players in total)")
+            return "\n".join(lines)
+        if verb == "kick":
+            number, _, _reason = args.partition(" ")
+            for guid, p in list(self.players.items()):
+                if str(p.number) == number:
+                    del self.players[guid]
+                    self.kicked[p.steam64] = time.time()
+            return ""
+        if verb == "addBan":
+            guid, _, rest = args.partition(" ")
+            _minutes, _, reason = rest.partition(" ")
+            self.bans.append((guid, reason))
+            return ""
+        if verb == "removeBan":
+            index = int(args)
+            if 0 <= index < len(self.bans):
+                del self.bans[index]
+            return ""
+        if verb == "bans":
+            lines = ["GUID Bans:", "[#] [GUID] [Minutes left] [Reason]", "-" * 46]
+            lines += [f"{i:<4}{guid} perm {reason}" for i, (guid, reason) in enumerate(self.bans)]
+            lines += ["", "IP Bans:", "[#] [IP Address] [Minutes left] [Reason]", "-" * 46]
+            return "\n".join(lines)
+        if verb == "writeBans":
+            self.ban_writes += 1
+            return ""
+        return "Unknown command"
@@ -0,0 +1,129 @@
+"""Synthetic DayZ Detailed Logs (``dl_*.ljson``) for benchmarks.
+
+    python bench/ljson_gen.py ./dayz_logs --lines 200000 --death-ratio 0.01 --rotate-every 50000
+
+Lines mimic the detailed-log mix: mostly position/hit/connect events with a
+``PLAYER_DEATH`` every ``1 / death_ratio`` lines. ``ts`` is the wall-clock time the
+line was generated, so consumers can measure death-to-enforcement latency from it.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+FIRST_STEAM64 = 76561198000000000
+FILLER_EVENTS = ("PLAYER_POSITION", "PLAYER_POSITION", "PLAYER_POSITION", "PLAYER_HIT", "PLAYER_CONNECT")
+
+
+def iso_now(now: Optional[float] = None) -> str:
+    return datetime.fromtimestamp(time.time() if now is None else now, timezone.utc).isoformat(timespec="milliseconds")
+
+
+def log_name(index: int, start: Optional[datetime] = None) -> str:
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return (start + timedelta(minutes=index)).strftime("dl_%Y%m%d_%H%M%S.ljson")
+
+
+class LjsonGenerator:
+    def __init__(
+        self,
+        logs_dir: Path,
+        players: int = 1000,
+        death_ratio: float = 0.01,
+        rotate_every: int = 0,
+        seed: int = 1,
+    ) -> None:
+        self.logs_dir = logs_dir
+        self.players = players
+        self.death_ratio = death_ratio
+        self.rotate_every = rotate_every
+        self.rng = random.Random(seed)
+        self.file_index = 0
+        self.lines_in_file = 0
+        self.lines_written = 0
+        self.deaths_written = 0
+        self.rotations = 0
+        # A death's (steamId, ts) is unique per player, which keeps the dedupe index honest.
+        self._last_ts: dict = {}
+        logs_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def current_path(self) -> Path:
+        return self.logs_dir / log_name(self.file_index)
+
+    def steam64s(self) -> List[str]:
+        return [str(FIRST_STEAM64 + i) for i in range(self.players)]
+
+    def make_line(self, now: float) -> str:
+        rng = self.rng
+        player = rng.randrange(self.players)
+        steam_id = FIRST_STEAM64 + player
+        pos = [round(rng.uniform(0, 15360), 1), round(rng.uniform(0, 400), 1), round(rng.uniform(0, 15360), 1)]
+        base = {"player": {"steamId": steam_id, "name": f"Survivor{player}", "pos": pos}}
+        if rng.random() < self.death_ratio:
+            ts = iso_now(now)
+            if self._last_ts.get(steam_id) == ts:
+                ts = iso_now(now + 0.001)
+            self._last_ts[steam_id] = ts
+            base["player"]["aliveSec"] = rng.randrange(30, 86400 * 3)
+            base.update(event="PLAYER_DEATH", ts=ts, cause=rng.choice(("Infected", "Player", "Fall", "Bleeding")))
+            self.deaths_written += 1
+        else:
+            event = rng.choice(FILLER_EVENTS)
+            base.update(event=event, ts=iso_now(now))
+            if event == "PLAYER_HIT":
+                base["damage"] = round(rng.uniform(1, 100), 2)
+                base["zone"] = rng.choice(("Head", "Torso", "LeftLeg", "RightArm"))
+        return json.dumps(base, separators=(",", ":"))
+
+    def write(self, count: int) -> None:
+        """Append ``count`` lines, rotating to a new file every ``rotate_every`` lines."""
+        now = time.time()
+        while count > 0:
+            if self.rotate_every and self.lines_in_file >= self.rotate_every:
+                self.file_index += 1
+                self.lines_in_file = 0
+                self.rotations += 1
+            batch = count if not self.rotate_every else min(count, self.rotate_every - self.lines_in_file)
+            with self.current_path.open("a", encoding="utf-8") as f:
+                f.write("".join(self.make_line(now) + "\n" for _ in range(batch)))
+            self.lines_in_file += batch
+            self.lines_written += batch
+            count -= batch
+
+    async def stream(self, rate: float, duration: float, tick: float = 0.01) -> None:
+        """Write ``rate`` lines per second for ``duration`` seconds in small ticks."""
+        started = time.monotonic()
+        base = self.lines_written
+        while True:
+            await asyncio.sleep(tick)
+            elapsed = min(time.monotonic() - started, duration)
+            owed = int(rate * elapsed) - (self.lines_written - base)
+            if owed > 0:
+                self.write(owed)
+            if elapsed >= duration:
+                return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs_dir", type=Path)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--death-ratio", type=float, default=0.01)
+    parser.add_argument("--rotate-every", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    gen = LjsonGenerator(args.logs_dir, args.players, args.death_ratio, args.rotate_every, args.seed)
+    gen.write(args.lines)
+    print(f"wrote {gen.lines_written} lines ({gen.deaths_written} deaths) across {gen.file_index + 1} file(s)")
+
+
+if __name__ == "__main__":
+    main()
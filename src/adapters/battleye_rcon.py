@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import struct
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# BattlEye RCon over UDP. Every packet is "BE", a little-endian CRC32 of the rest,
+# then 0xFF, a type byte and the payload:
+#   0x00 login:           client sends the password, server answers 0x01 (ok) / 0x00
+#   0x01 command:         seq byte + command; the reply echoes seq and may be split
+#                         into parts prefixed with 0x00, part count, part index
+#   0x02 server message:  seq byte + text; the client must echo the seq back
+# An empty command is a keepalive; the server drops clients silent for 45 seconds.
+
+LOGIN = 0x00
+COMMAND = 0x01
+SERVER_MESSAGE = 0x02
+
+KEEPALIVE_SECONDS = 30.0
+# Sequence numbers are one byte; staying well below 256 outstanding commands means a
+# late reply can never be matched to a newer command that reused its number.
+MAX_IN_FLIGHT = 64
+
+
+class RconError(Exception):
+    pass
+
+
+class RconAuthError(RconError):
+    pass
+
+
+def encode_packet(kind: int, payload: bytes = b"") -> bytes:
+    body = bytes((0xFF, kind)) + payload
+    return b"BE" + struct.pack("<I", zlib.crc32(body) & 0xFFFFFFFF) + body
+
+
+def decode_packet(data: bytes) -> Tuple[int, bytes]:
+    if len(data) < 8 or data[:2] != b"BE" or data[6] != 0xFF:
+        raise RconError("not a BattlEye packet")
+    (crc,) = struct.unpack_from("<I", data, 2)
+    if zlib.crc32(data[6:]) & 0xFFFFFFFF != crc:
+        raise RconError("bad packet checksum")
+    return data[7], data[8:]
+
+
+def be_guid(steam64: str) -> str:
+    """BattlEye GUID of a Steam account: md5 of "BE" + the little-endian steam64."""
+    return hashlib.md5(b"BE" + struct.pack("<Q", int(steam64))).hexdigest()
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, client: "BattlEyeRconClient") -> None:
+        self.client = client
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.client._received(data)
+
+    def error_received(self, exc: Exception) -> None:
+        logger.debug("RCon socket error", extra={"error": str(exc)})
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.client._lost()
+
+
+class BattlEyeRconClient:
+    """Async BattlEye RCon client holding one authenticated UDP session.
+
+    ``command`` may be called concurrently; at most ``max_in_flight`` commands are
+    outstanding at once, each with its own sequence number, and each is retransmitted
+    ``retries`` times before the session is considered dead.
+    A keepalive is sent whenever the client has been idle for ``keepalive`` seconds.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        timeout: float = 2.0,
+        retries: int = 3,
+        keepalive: float = KEEPALIVE_SECONDS,
+        on_message: Optional[Callable[[str], None]] = None,
+        max_in_flight: int = MAX_IN_FLIGHT,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.retries = retries
+        self.keepalive = keepalive
+        self.on_message = on_message
+        self.connected = False
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._login: Optional[asyncio.Future] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._parts: Dict[int, List[Optional[bytes]]] = {}
+        self._seq = 0
+        self._slots = asyncio.Semaphore(min(max_in_flight, 255))
+        self._last_sent = 0.0
+        self._keepalive_task: Optional[asyncio.Task] = None
+        self.commands_sent = 0
+
+    async def connect(self) -> None:
+        await self.close()
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _Protocol(self), remote_addr=(self.host, self.port)
+        )
+        for _ in range(self.retries):
+            self._login = loop.create_future()
+            self._send(encode_packet(LOGIN, self.password.encode()))
+            try:
+                ok = await asyncio.wait_for(self._login, self.timeout)
+                break
+            except asyncio.TimeoutError:
+                continue
+        else:
+            await self.close()
+            raise RconError(f"no login reply from {self.host}:{self.port}")
+        if not ok:
+            await self.close()
+            raise RconAuthError(f"RCon login rejected by {self.host}:{self.port}")
+        self.connected = True
+        self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+        logger.info("RCon connected", extra={"host": self.host, "port": self.port})
+
+    async def close(self) -> None:
+        self.connected = False
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        self._fail_pending(RconError("connection closed"))
+
+    async def command(self, text: str, retry: bool = True) -> str:
+        """Send one command and return its reply.
+
+        Pass ``retry=False`` for commands addressed by a number that may shift
+        (``kick``, ``removeBan``): a retransmit after a lost reply could hit a
+        different player or ban.
+        """
+        async with self._slots:
+            return await self._command(text, retry)
+
+    async def _command(self, text: str, retry: bool) -> str:
+        if not self.connected:
+            raise RconError("not connected")
+        seq = self._next_seq()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[seq] = future
+        packet = encode_packet(COMMAND, bytes((seq,)) + text.encode())
+        try:
+            for _ in range(self.retries if retry else 1):
+                self._send(packet)
+                try:
+                    # shield: a timed-out attempt must not cancel the shared future.
+                    reply = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+                    self.commands_sent += 1
+                    return reply
+                except asyncio.TimeoutError:
+                    continue
+        finally:
+            self._pending.pop(seq, None)
+            self._parts.pop(seq, None)
+        if retry:
+            # Every retransmit went unanswered: treat the session as gone.
+            self.connected = False
+        raise RconError(f"no reply to {text.split(' ', 1)[0] or 'keepalive'!r}")
+
+    def _next_seq(self) -> int:
+        # The semaphore keeps fewer than 256 commands pending, so a free number exists.
+        while self._seq in self._pending:
+            self._seq = (self._seq + 1) % 256
+        seq = self._seq
+        self._seq = (seq + 1) % 256
+        return seq
+
+    def _send(self, packet: bytes) -> None:
+        if self._transport is None:
+            raise RconError("not connected")
+        self._transport.sendto(packet)
+        self._last_sent = time.monotonic()
+
+    def _received(self, data: bytes) -> None:
+        try:
+            kind, payload = decode_packet(data)
+        except RconError:
+            logger.debug("Dropping malformed RCon packet")
+            return
+        if kind == LOGIN:
+            if self._login is not None and not self._login.done():
+                self._login.set_result(payload[:1] == b"\x01")
+        elif kind == COMMAND and payload:
+            self._command_reply(payload[0], payload[1:])
+        elif kind == SERVER_MESSAGE and payload:
+            if self._transport is not None:
+                self._transport.sendto(encode_packet(SERVER_MESSAGE, payload[:1]))
+            if self.on_message is not None:
+                self.on_message(payload[1:].decode("utf-8", "replace"))
+
+    def _command_reply(self, seq: int, body: bytes) -> None:
+        future = self._pending.get(seq)
+        if future is None or future.done():
+            return
+        if len(body) >= 3 and body[0] == 0x00:
+            count, index = body[1], body[2]
+            parts = self._parts.setdefault(seq, [None] * count)
+            if index < len(parts):
+                parts[index] = body[3:]
+            if any(p is None for p in parts):
+                return
+            body = b"".join(parts)
+        future.set_result(body.decode("utf-8", "replace"))
+
+    def _lost(self) -> None:
+        self.connected = False
+        self._fail_pending(RconError("connection lost"))
+
+    def _fail_pending(self, exc: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self._pending.clear()
+        self._parts.clear()
+
+    async def _keepalive_loop(self) -> None:
+        while self.connected:
+            idle = time.monotonic() - self._last_sent
+            if idle < self.keepalive:
+                await asyncio.sleep(self.keepalive - idle)
+                continue
+            try:
+                await self.command("")
+            except RconError:
+                logger.warning("RCon keepalive failed", extra={"host": self.host, "port": self.port})
+                return
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from adapters.file_manager import atomic_write, atomic_write_async, drain, write_serialized, write_serialized_async
+
+logger = logging.getLogger(__name__)
+
+# A deferred write that failed (disk full, permissions) is retried no sooner than this.
+RETRY_SECONDS = 1.0
+
+
+class CoalescingWriter:
+    """Atomically rewrites ``path`` from ``render()`` at most once per ``window`` seconds.
+
+    ``mark_dirty`` is cheap and can be called on every mutation; ``await flush()`` is
+    the barrier for shutdown and other paths that need the file on disk right now.
+    Content is rendered on the event loop and written on the file I/O pool. With
+    ``serialize``, ``render`` only takes a cheap private snapshot on the loop and
+    ``serialize(snapshot)`` builds the text on the pool. Without a running event loop
+    writes happen immediately and synchronously. A failed deferred write is retried.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        render: Callable[[], Any],
+        window: float = 0.25,
+        serialize: Optional[Callable[[Any], str]] = None,
+    ) -> None:
+        self.path = path
+        self.render = render
+        self.serialize = serialize
+        self.window = window
+        self.dirty = False
+        self.write_count = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._after_write: List[Callable[[], None]] = []
+
+    def mark_dirty(self) -> None:
+        self.dirty = True
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_now()
+            return
+        self._timer = loop.call_later(max(self.window, 0), self._on_timer)
+
+    def _retry_later(self) -> None:
+        if self._timer is None and self.dirty:
+            self._timer = asyncio.get_running_loop().call_later(max(self.window, RETRY_SECONDS), self._on_timer)
+
+    def call_after_write(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` once the next write that includes the current state lands."""
+        self._after_write.append(callback)
+
+    async def wait_written(self) -> None:
+        """Wait until the current state is on disk, without forcing an early write."""
+        if not self.dirty:
+            # Nothing new, but a deferred write of this state may still be on the pool.
+            await drain(self.path)
+            return
+        written = asyncio.get_running_loop().create_future()
+        self.call_after_write(lambda: written.done() or written.set_result(None))
+        await written
+
+    def _written(self, callbacks: List[Callable[[], None]]) -> None:
+        self.write_count += 1
+        for callback in callbacks:
+            callback()
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._task = asyncio.ensure_future(self._flush_logged())
+
+    async def _flush_logged(self) -> None:
+        try:
+            await self.flush()
+        except OSError:
+            logger.exception("Deferred write failed, retrying", extra={"path": str(self.path)})
+            self._retry_later()
+
+    def _write_now(self) -> None:
+        self.dirty = False
+        callbacks, self._after_write = self._after_write, []
+        try:
+            if self.serialize is not None:
+                write_serialized(self.path, self.serialize, self.render())
+            else:
+                atomic_write(self.path, self.render())
+        except OSError:
+            self.dirty = True
+            self._after_write[:0] = callbacks
+            raise
+        self._written(callbacks)
+
+    async def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.dirty:
+            # Nothing new, but a deferred write may still be on the pool.
+            await drain(self.path)
+            return
+        self.dirty = False
+        callbacks, self._after_write = self._after_write, []
+        try:
+            if self.serialize is not None:
+                await write_serialized_async(self.path, self.serialize, self.render())
+            else:
+                await atomic_write_async(self.path, self.render())
+        except OSError:
+            self.dirty = True
+            self._after_write[:0] = callbacks
+            raise
+        self._written(callbacks)
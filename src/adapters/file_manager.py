@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import logging
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from metrics import FILE_WRITE
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+IO_WORKERS = 4
+_io_executor: Optional[ThreadPoolExecutor] = None
+_path_locks: Dict[str, asyncio.Lock] = {}
+
 
 def atomic_write(path: Path, content: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -19,6 +30,19 @@ def atomic_write(path: Path, content: str) -> None:
     logger.debug("Atomic write complete", extra={"path": str(path)})
 
 
+def atomic_write_bytes(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", delete=False, dir=str(path.parent)) as tmp:
+        tmp.write(content)
+        temp_name = tmp.name
+    os.replace(temp_name, path)
+    logger.debug("Atomic write complete", extra={"path": str(path)})
+
+
+def write_serialized(path: Path, serialize: Callable[[T], str], snapshot: T) -> None:
+    atomic_write(path, serialize(snapshot))
+
+
 def write_lines(path: Path, lines: Iterable[str]) -> None:
     atomic_write(path, "\n".join(lines) + "\n")
 
@@ -41,3 +65,72 @@ def read_json(path: Path, default: Dict[str, Any]) -> Dict[str, Any]:
 
 def write_json(path: Path, payload: Dict[str, Any]) -> None:
     atomic_write(path, json.dumps(payload, indent=2))
+
+
+def read_chunk(path: Path, offset: int, size: int) -> bytes:
+    with path.open("rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+# Async variants: blocking work runs on a small dedicated pool so the event loop keeps
+# servicing the gateway. Calls for the same path are serialized in submission order
+# (asyncio.Lock wakes waiters FIFO), so a later write can never be overtaken by an
+# earlier one still sitting in the pool.
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="file-io")
+    return _io_executor
+
+
+async def run_io(path: Path, func: Callable[..., T], *args: Any) -> T:
+    lock = _path_locks.setdefault(str(path), asyncio.Lock())
+    async with lock:
+        return await asyncio.get_running_loop().run_in_executor(_executor(), functools.partial(func, *args))
+
+
+async def drain(path: Path) -> None:
+    lock = _path_locks.get(str(path))
+    if lock is not None:
+        async with lock:
+            pass
+
+
+async def atomic_write_async(path: Path, content: str) -> None:
+    with FILE_WRITE.time(path.name):
+        await run_io(path, atomic_write, path, content)
+
+
+async def atomic_write_bytes_async(path: Path, content: bytes) -> None:
+    with FILE_WRITE.time(path.name):
+        await run_io(path, atomic_write_bytes, path, content)
+
+
+async def write_serialized_async(path: Path, serialize: Callable[[T], str], snapshot: T) -> None:
+    # ``snapshot`` must not be shared with the loop: it is serialized on the pool.
+    with FILE_WRITE.time(path.name):
+        await run_io(path, write_serialized, path, serialize, snapshot)
+
+
+async def write_lines_async(path: Path, lines: Iterable[str]) -> None:
+    await atomic_write_async(path, "\n".join(lines) + "\n")
+
+
+async def read_lines_async(path: Path) -> List[str]:
+    return await run_io(path, read_lines, path)
+
+
+async def read_json_async(path: Path, default: Dict[str, Any]) -> Dict[str, Any]:
+    return await run_io(path, read_json, path, default)
+
+
+async def write_json_async(path: Path, payload: Dict[str, Any]) -> None:
+    # Serialize on the caller's thread: the payload may be mutated once we yield.
+    await atomic_write_async(path, json.dumps(payload, indent=2))
+
+
+async def read_chunk_async(path: Path, offset: int, size: int) -> bytes:
+    return await run_io(path, read_chunk, path, offset, size)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+DISCORD_MESSAGE_LIMIT = 2000
+MAX_PENDING_NOTICES = 500
+
+
+@dataclass
+class _PendingEdit:
+    member: discord.Member
+    add: Set[int] = field(default_factory=set)
+    remove: Set[int] = field(default_factory=set)
+    disconnect: bool = False
+    reason: str = ""
+    on_done: List[Callable[[], None]] = field(default_factory=list)
+
+
+class DiscordActionScheduler:
+    """Central queue for member role/voice edits and bot-spam notices.
+
+    Role changes and a voice disconnect requested for the same member within the
+    coalescing window are merged into one ``member.edit`` call; requests that cancel
+    out (a death immediately followed by a revive) are dropped without touching the
+    API. Edits are paced to ``actions_per_second`` and notices are sent as periodic
+    digests instead of one message each. A 429 that gets through anyway is waited out
+    inside discord.py, so ``pacing_wait_seconds`` only counts this queue's own pacing.
+    """
+
+    def __init__(
+        self,
+        spam_channel: Callable[[], Optional[discord.abc.Messageable]],
+        coalesce_delay: float = 0.5,
+        actions_per_second: float = 5.0,
+        digest_interval: float = 10.0,
+    ) -> None:
+        self.spam_channel = spam_channel
+        self.coalesce_delay = coalesce_delay
+        self.min_interval = 1.0 / actions_per_second if actions_per_second > 0 else 0.0
+        self.digest_interval = digest_interval
+        self._pending: "OrderedDict[int, _PendingEdit]" = OrderedDict()
+        self._notices: Deque[str] = deque()
+        self._dropped_notices = 0
+        self._wakeup = asyncio.Event()
+        self._next_slot = 0.0
+        self._tasks: List[asyncio.Task] = []
+        self.edits_sent = 0
+        self.actions_merged = 0
+        self.actions_cancelled = 0
+        self.pacing_wait_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self.queue_depth,
+            "notices_pending": len(self._notices),
+            "edits_sent": self.edits_sent,
+            "actions_merged": self.actions_merged,
+            "actions_cancelled": self.actions_cancelled,
+            "pacing_wait_seconds": round(self.pacing_wait_seconds, 3),
+        }
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._edit_loop()), asyncio.create_task(self._digest_loop())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self._drain_edits()
+        await self._send_digest()
+
+    def request_roles(
+        self,
+        member: discord.Member,
+        add: Iterable[int] = (),
+        remove: Iterable[int] = (),
+        disconnect: Optional[bool] = None,
+        reason: str = "",
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> None:
+        pending = self._pending.get(member.id)
+        if pending is None:
+            pending = self._pending[member.id] = _PendingEdit(member=member)
+        else:
+            self.actions_merged += 1
+            pending.member = member
+        # Later requests win per role, so opposite requests collapse to the latest intent.
+        for role_id in add:
+            pending.remove.discard(role_id)
+            pending.add.add(role_id)
+        for role_id in remove:
+            pending.add.discard(role_id)
+            pending.remove.add(role_id)
+        if disconnect is not None:
+            pending.disconnect = disconnect
+        if reason:
+            pending.reason = reason
+        if on_done is not None:
+            pending.on_done.append(on_done)
+        self._wakeup.set()
+
+    def notify(self, message: str) -> None:
+        if len(self._notices) >= MAX_PENDING_NOTICES:
+            self._notices.popleft()
+            self._dropped_notices += 1
+        self._notices.append(message)
+
+    async def _edit_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(self.coalesce_delay)
+            await self._drain_edits()
+
+    async def _drain_edits(self) -> None:
+        while self._pending:
+            _, pending = self._pending.popitem(last=False)
+            try:
+                await self._apply(pending)
+            except discord.HTTPException:
+                logger.warning("Member edit failed", extra={"member": pending.member.id}, exc_info=True)
+                continue
+            except Exception:
+                # Anything else would end the edit loop for good; drop this edit only.
+                logger.exception("Member edit crashed", extra={"member": pending.member.id})
+                continue
+            for callback in pending.on_done:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Member edit callback failed", extra={"member": pending.member.id})
+
+    async def _apply(self, pending: _PendingEdit) -> None:
+        member = pending.member.guild.get_member(pending.member.id) or pending.member
+        current = [r for r in member.roles if not r.is_default()]
+        roles = [r for r in current if r.id not in pending.remove]
+        have = {r.id for r in roles}
+        for role_id in pending.add - have:
+            role = member.guild.get_role(role_id)
+            if role:
+                roles.append(role)
+        kwargs = {}
+        if {r.id for r in roles} != {r.id for r in current}:
+            kwargs["roles"] = roles
+        if pending.disconnect and member.voice and member.voice.channel:
+            kwargs["voice_channel"] = None
+        if not kwargs:
+            self.actions_cancelled += 1
+            return
+
+        await self._wait_for_slot()
+        await member.edit(reason=pending.reason or None, **kwargs)
+        self.edits_sent += 1
+
+    async def _wait_for_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        wait = self._next_slot - loop.time()
+        if wait > 0:
+            self.pacing_wait_seconds += wait
+            await asyncio.sleep(wait)
+        self._next_slot = loop.time() + self.min_interval
+
+    async def _digest_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.digest_interval)
+            try:
+                await self._send_digest()
+            except discord.HTTPException:
+                logger.warning("Failed to send spam digest", exc_info=True)
+            except Exception:
+                logger.exception("Spam digest crashed")
+
+    async def _send_digest(self) -> None:
+        if not self._notices:
+            return
+        channel = self.spam_channel()
+        if channel is None:
+            return
+        lines = list(self._notices)
+        self._notices.clear()
+        if self._dropped_notices:
+            lines.append(f"... {self._dropped_notices} older notices dropped")
+            self._dropped_notices = 0
+        for message in _pack_lines(lines):
+            await channel.send(message)
+
+
+def _pack_lines(lines: List[str]) -> List[str]:
+    messages: List[str] = []
+    current = ""
+    for line in lines:
+        line = line[: DISCORD_MESSAGE_LIMIT]
+        if current and len(current) + 1 + len(line) > DISCORD_MESSAGE_LIMIT:
+            messages.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        messages.append(current)
+    return messages
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Optional, Union
+
+from bot.action_scheduler import DiscordActionScheduler
+from bot.member_resolver import MemberResolver
+from metrics import observe_stage
+from services.banlist_service import BanlistFanout, BanlistService
+from services.user_service import UserService
+
+# Called as (payload, stage) when a death reaches "queued", "db", "ban_written",
+# "kicked" or "discord".
+StageCallback = Callable[[dict, str], None]
+
+
+class DeathEnforcer:
+    """Applies one PLAYER_DEATH: user DB, ban list, RCon kick and Discord roles.
+
+    This is the pipeline handler of the bot, and the benchmark drives the same code.
+    ``on_stage`` reports how far each death got; by default into the death stage
+    latency histogram.
+
+    The user DB and ban.txt are written by coalescing writers, so a call returns an
+    awaitable that completes once both hold this death. Until then the death must
+    not count as processed: a crash before that point has to replay it.
+    """
+
+    def __init__(
+        self,
+        user_service: UserService,
+        banlist_service: Union[BanlistService, BanlistFanout],
+        actions: DiscordActionScheduler,
+        members: MemberResolver,
+        ban_duration_days: int,
+        dead_role_id: int,
+        alive_role_id: int,
+        on_stage: StageCallback = observe_stage,
+    ) -> None:
+        self.user_service = user_service
+        self.banlist_service = banlist_service
+        self.actions = actions
+        self.members = members
+        self.ban_duration_days = ban_duration_days
+        self.dead_role_id = dead_role_id
+        self.alive_role_id = alive_role_id
+        self.on_stage = on_stage
+        self.deaths_enforced = 0
+        self.role_swaps_requested = 0
+
+    async def __call__(self, payload: dict) -> Optional[Awaitable[None]]:
+        player = payload.get("player", {})
+        steam64 = str(player.get("steamId"))
+        self.on_stage(payload, "queued")
+        user = self.user_service.mark_death(steam64, payload.get("ts"), player.get("aliveSec"), self.ban_duration_days)
+        if not user:
+            return None
+        self.deaths_enforced += 1
+        self.user_service.save()
+        self.on_stage(payload, "db")
+        self.banlist_service.add_ban(steam64, on_written=self._stage(payload, "ban_written"))
+        self.banlist_service.kick(steam64, on_done=self._stage(payload, "kicked"))
+
+        member = await self.members.resolve(user.discordId)
+        if member:
+            self.role_swaps_requested += 1
+            self.actions.request_roles(
+                member,
+                add=[self.dead_role_id],
+                remove=[self.alive_role_id],
+                disconnect=True,
+                reason="DayZ death enforcement",
+                on_done=self._stage(payload, "discord"),
+            )
+            self.actions.notify(f"{member.mention} died in DayZ. Steam64={steam64}")
+        return asyncio.gather(self.user_service.wait_written(), self.banlist_service.wait_written())
+
+    def _stage(self, payload: dict, stage: str) -> Callable[[], None]:
+        return lambda: self.on_stage(payload, stage)
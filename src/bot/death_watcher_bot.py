@@ -1,20 +1,57 @@
 from __future__ import annotations
 
 import asyncio
+import io
 import logging
-from datetime import datetime, timezone
-from typing import Optional
+import time
+from typing import Awaitable, List, Optional
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 
-from config import Config
+from bot.action_scheduler import DiscordActionScheduler
+from bot.death_enforcer import DeathEnforcer
+from bot.member_resolver import MemberResolver
+from bot.reconciler import Reconciler
+from bot.voice_pool import PrivateVoicePool
+from bot.voice_sessions import SettledSession, VoiceSessionTracker
+from adapters.battleye_rcon import BattlEyeRconClient
+from config import Config, ServerConfig
+from diagnostics import MAX_PROFILE_SECONDS, LoopLagWatchdog, capture_profile
+from metrics import (
+    ACTION_QUEUE_DEPTH,
+    DISCORD_ACTIONS_MERGED,
+    DISCORD_CALL,
+    DISCORD_EDITS,
+    DISCORD_PACING_WAIT,
+    LOG_BYTES,
+    LOG_LINES,
+    PIPELINE_DEPTH,
+    REVIVE_BATCH,
+    REVIVE_DELAY,
+    REVIVES,
+    TAIL_LAG,
+    VC_POOL_IDLE,
+    VC_POOL_REQUESTS,
+    MetricsServer,
+)
+from services.sqlite_user_service import SqliteUserService
 from services.user_service import UserService
-from services.banlist_service import BanlistService
+from services.banlist_service import BanlistFanout, BanlistService
+from services.death_pipeline import DeathEventPipeline
+from services.player_stats import BOARDS, PlayerStatsStore
+from services.rcon_delivery import RconBanDelivery
+from services.validation_import import parse_validation_rows
+from watchers.event_dedupe import ProcessedEventIndex, default_index_path
 from watchers.log_watcher import LogWatcher
 
 logger = logging.getLogger(__name__)
 
+MAX_BULK_UPLOAD_BYTES = 1024 * 1024
+BULK_REPORT_LIMIT = 20
+DEFAULT_PROFILE_SECONDS = 30.0
+LEADERBOARD_SIZE = 10
+
 
 class DeathWatcherBot(commands.Bot):
     def __init__(self, config: Config):
@@ -24,79 +61,201 @@ class DeathWatcherBot(commands.Bot):
         intents.voice_states = True
         super().__init__(command_prefix="!", intents=intents)
         self.config = config
-        self.user_service = UserService(config.userdata_db_path)
-        self.banlist_service = BanlistService(config.ban_txt_path, config.whitelist_txt_path)
-        self.log_watcher = LogWatcher(
-            config.path_to_logs_directory, config.path_to_cache, self._on_death_event
+        write_window = config.write_coalesce_ms / 1000
+        if config.userdata_backend == "sqlite":
+            self.user_service = SqliteUserService(config.userdata_sqlite_path, migrate_from=config.userdata_db_path)
+        else:
+            self.user_service = UserService(config.userdata_db_path, write_window, config.userdata_snapshot_path)
+        # One ban/whitelist pair per DayZ server; every change is fanned out to all of them.
+        self.banlist_service = BanlistFanout(
+            [
+                BanlistService(s.ban_txt_path, s.whitelist_txt_path, write_window, rcon=_rcon_delivery(s))
+                for s in config.servers
+            ]
+        )
+        self.death_pipeline = DeathEventPipeline(
+            self._on_death_event, config.enforcement_workers, config.enforcement_queue_size
+        )
+        self.player_stats = PlayerStatsStore(config.player_stats_path)
+        self.log_watchers = [
+            LogWatcher(
+                server.path_to_logs_directory,
+                server.path_to_cache,
+                self.death_pipeline.submit,
+                dedupe=ProcessedEventIndex(
+                    default_index_path(server.path_to_cache), ttl=config.dedupe_ttl_hours * 3600
+                ),
+                checkpoint_interval=config.cursor_checkpoint_seconds,
+                checkpoint_events=config.cursor_checkpoint_events,
+                name=server.name,
+                stats=self.player_stats,
+            )
+            for server in config.servers
+        ]
+        self.actions = DiscordActionScheduler(
+            lambda: self.get_channel(config.bot_spam_channel_id),
+            coalesce_delay=config.discord_action_coalesce_ms / 1000,
+            actions_per_second=config.discord_actions_per_second,
+            digest_interval=config.spam_digest_seconds,
+        )
+        self.members = MemberResolver(
+            self,
+            config.guild_id,
+            ttl=config.member_cache_ttl_seconds,
+            max_size=config.member_cache_size,
+            negative_ttl=config.member_negative_ttl_seconds,
+        )
+        self.death_enforcer = DeathEnforcer(
+            self.user_service,
+            self.banlist_service,
+            self.actions,
+            self.members,
+            config.ban_duration_days,
+            config.dead_role_id,
+            config.alive_role_id,
+        )
+        self.vc_pool = PrivateVoicePool(
+            config.online_category_id, size=config.vc_pool_size, refill_interval=config.vc_pool_refill_seconds
+        )
+        self.voice_sessions = VoiceSessionTracker(
+            self._commit_voice_sessions,
+            grace=config.voice_grace_seconds,
+            batch_window=config.voice_commit_batch_ms / 1000,
+        )
+        self.reconciler = Reconciler(config, self.user_service, self.banlist_service, self.actions, self.members)
+        self.watcher_tasks: List[asyncio.Task] = []
+        self.revive_bg_task = None
+        self.reconcile_bg_task = None
+        self.stats_backfill_task = None
+        self.metrics_server = MetricsServer(config.metrics_host, config.metrics_port) if config.metrics_port else None
+        self.watchdog = (
+            LoopLagWatchdog(threshold=config.loop_lag_threshold_ms / 1000) if config.loop_lag_threshold_ms > 0 else None
         )
-        self.bg_task = None
         self.add_command(self.validate_user)
+        self.add_command(self.validate_bulk)
+        self.add_command(self.reconcile)
+        self.add_command(self.profile)
+        self.add_command(self.stats)
+        self.add_command(self.leaderboard)
 
     async def setup_hook(self) -> None:
-        self.bg_task = asyncio.create_task(self.log_watcher.run())
-        self.revive_task.start()
+        self._register_metrics()
+        if self.metrics_server:
+            await self.metrics_server.start()
+        if self.watchdog:
+            self.watchdog.start()
+        self.actions.start()
+        self.banlist_service.start()
+        self.voice_sessions.start()
+        self.death_pipeline.start()
+        self.watcher_tasks = [asyncio.create_task(watcher.run()) for watcher in self.log_watchers]
+        if self.player_stats.needs_backfill:
+            # Deaths the tailers record meanwhile are deduplicated by the store.
+            self.stats_backfill_task = asyncio.create_task(
+                self.player_stats.backfill(s.path_to_logs_directory for s in self.config.servers)
+            )
+        self.revive_bg_task = asyncio.create_task(self.revive_task())
+        if self.config.reconcile_interval_minutes > 0:
+            self.reconcile_bg_task = asyncio.create_task(self.reconcile_task())
         logger.info("Bot setup complete", extra=self.config.to_sanitized_dict())
 
     async def close(self) -> None:
-        if self.bg_task:
-            self.log_watcher.running = False
-            self.bg_task.cancel()
+        for watcher, task in zip(self.log_watchers, self.watcher_tasks):
+            watcher.running = False
+            task.cancel()
+        if self.revive_bg_task:
+            self.revive_bg_task.cancel()
+        if self.reconcile_bg_task:
+            self.reconcile_bg_task.cancel()
+        if self.stats_backfill_task:
+            self.stats_backfill_task.cancel()
+        # Let the tailers finish their final checkpoint before the pipeline and the
+        # writers they feed are shut down.
+        await asyncio.gather(*self.watcher_tasks, return_exceptions=True)
+        await self.voice_sessions.stop()
+        self.vc_pool.stop()
+        await self.death_pipeline.stop()
+        # The tailers' last checkpoint stopped at deaths still queued; persist the
+        # cursor again now that the pipeline has drained.
+        await asyncio.gather(*(watcher.checkpoint() for watcher in self.log_watchers))
+        await self.actions.stop()
+        await self.user_service.close()
+        await self.banlist_service.close()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.watchdog:
+            self.watchdog.stop()
         await super().close()
 
+    def _register_metrics(self) -> None:
+        LOG_LINES.set_function(lambda: {(w.name,): w.lines_parsed for w in self.log_watchers})
+        LOG_BYTES.set_function(lambda: {(w.name,): w.bytes_read for w in self.log_watchers})
+        TAIL_LAG.set_function(lambda: {(w.name,): w.tail_lag_bytes() for w in self.log_watchers})
+        PIPELINE_DEPTH.set_function(lambda: {(): self.death_pipeline.depth})
+        ACTION_QUEUE_DEPTH.set_function(lambda: {(): self.actions.queue_depth})
+        DISCORD_EDITS.set_function(lambda: {(): self.actions.edits_sent})
+        DISCORD_ACTIONS_MERGED.set_function(lambda: {(): self.actions.actions_merged})
+        DISCORD_PACING_WAIT.set_function(lambda: {(): self.actions.pacing_wait_seconds})
+        VC_POOL_IDLE.set_function(lambda: {(): self.vc_pool.idle_count})
+        VC_POOL_REQUESTS.set_function(lambda: {("hit",): self.vc_pool.hits, ("miss",): self.vc_pool.misses})
+
+        # Every Discord REST call goes through HTTPClient.request; route.path is the
+        # unformatted template, so the label set stays small.
+        request = self.http.request
+
+        async def timed_request(route, **kwargs):
+            started = time.perf_counter()
+            status = "error"
+            try:
+                response = await request(route, **kwargs)
+                status = "ok"
+                return response
+            except discord.HTTPException as exc:
+                status = str(exc.status)
+                raise
+            finally:
+                DISCORD_CALL.observe(time.perf_counter() - started, route.method, route.path, status)
+
+        self.http.request = timed_request
+
     async def on_ready(self):
         logger.info("Bot connected", extra={"user": str(self.user)})
+        await self.members.prefetch()
+        guild = self.get_guild(self.config.guild_id)
+        if guild:
+            self.vc_pool.start(guild)
 
-    async def _on_death_event(self, payload: dict) -> None:
-        player = payload.get("player", {})
-        steam64 = str(player.get("steamId"))
-        alive_sec = player.get("aliveSec")
-        death_ts = payload.get("ts")
-        user = self.user_service.mark_death(steam64, death_ts, alive_sec, self.config.ban_duration_days)
-        if not user:
-            return
-        self.user_service.save()
-        self.banlist_service.add_ban(steam64)
+    async def on_member_join(self, member: discord.Member):
+        self.members.remember(member)
 
-        member = await self._fetch_member(user.discordId)
-        if not member:
-            return
-        await self._swap_roles_on_death(member)
-        await member.edit(voice_channel=None, reason="DayZ death enforcement")
-        await self._log_to_spam(f"{member.mention} died in DayZ. Steam64={steam64}")
+    async def on_member_remove(self, member: discord.Member):
+        self.members.forget(member.id, departed=True)
+
+    async def _on_death_event(self, payload: dict) -> Optional[Awaitable[None]]:
+        return await self.death_enforcer(payload)
 
     async def _fetch_member(self, discord_id: int) -> Optional[discord.Member]:
-        guild = self.get_guild(self.config.guild_id)
-        if not guild:
-            try:
-                guild = await self.fetch_guild(self.config.guild_id)
-            except discord.HTTPException:
-                return None
-        return guild.get_member(discord_id) or await guild.fetch_member(discord_id)
-
-    async def _swap_roles_on_death(self, member: discord.Member) -> None:
-        alive_role = member.guild.get_role(self.config.alive_role_id)
-        dead_role = member.guild.get_role(self.config.dead_role_id)
-        if alive_role:
-            await member.remove_roles(alive_role, reason="Death state")
-        if dead_role and dead_role not in member.roles:
-            await member.add_roles(dead_role, reason="Death state")
-
-    async def _swap_roles_on_revive(self, member: discord.Member) -> None:
-        alive_role = member.guild.get_role(self.config.alive_role_id)
-        dead_role = member.guild.get_role(self.config.dead_role_id)
-        if dead_role:
-            await member.remove_roles(dead_role, reason="Revived")
-        if alive_role and alive_role not in member.roles:
-            await member.add_roles(alive_role, reason="Revived")
-
-    async def _log_to_spam(self, message: str) -> None:
-        channel = self.get_channel(self.config.bot_spam_channel_id)
-        if channel:
-            await channel.send(message)
+        return await self.members.resolve(discord_id)
+
+    def _swap_roles_on_revive(self, member: discord.Member) -> None:
+        # disconnect=False also cancels a death disconnect that has not been sent yet.
+        self.actions.request_roles(
+            member,
+            add=[self.config.alive_role_id],
+            remove=[self.config.dead_role_id],
+            disconnect=False,
+            reason="Revived",
+        )
+
+    def _log_to_spam(self, message: str) -> None:
+        self.actions.notify(message)
+
+    def _is_admin(self, member: discord.abc.User) -> bool:
+        return any(role.id == self.config.admin_role_id for role in getattr(member, "roles", ()))
 
     @commands.command(name="validate")
     async def validate_user(self, ctx: commands.Context, member: discord.Member, steam64: str):
-        if not any(role.id == self.config.admin_role_id for role in ctx.author.roles):
+        if not self._is_admin(ctx.author):
             await ctx.reply("You do not have permission to validate users.")
             return
         user = self.user_service.mark_validated(steam64, member.id)
@@ -104,8 +263,120 @@ class DeathWatcherBot(commands.Bot):
         self.banlist_service.add_to_whitelist_and_ban(steam64)
         await ctx.reply(f"Validated {member.mention} with steam64={steam64}. Added to whitelist and banned until VC join.")
 
+    @commands.command(name="validate_bulk")
+    async def validate_bulk(self, ctx: commands.Context):
+        if not self._is_admin(ctx.author):
+            await ctx.reply("You do not have permission to validate users.")
+            return
+        if not ctx.message.attachments:
+            await ctx.reply("Attach a CSV/text file with one `discord_id,steam64` pair per line.")
+            return
+        attachment = ctx.message.attachments[0]
+        if attachment.size > MAX_BULK_UPLOAD_BYTES:
+            await ctx.reply(f"File too large ({attachment.size} bytes, limit {MAX_BULK_UPLOAD_BYTES}).")
+            return
+        try:
+            text = (await attachment.read()).decode("utf-8-sig")
+        except (discord.HTTPException, UnicodeDecodeError) as exc:
+            await ctx.reply(f"Could not read {attachment.filename}: {exc}")
+            return
+
+        pairs, errors = parse_validation_rows(text)
+        members = await self.members.resolve_many(discord_id for discord_id, _ in pairs)
+        accepted = [(discord_id, steam64) for discord_id, steam64 in pairs if discord_id in members]
+        missing = [discord_id for discord_id, _ in pairs if discord_id not in members]
+
+        # One pass over the in-memory state, then a single write per file.
+        self.user_service.mark_validated_many(accepted)
+        self.user_service.save()
+        self.banlist_service.add_to_whitelist_and_ban_many(steam64 for _, steam64 in accepted)
+        await self.user_service.flush()
+        await self.banlist_service.flush()
+        logger.info(
+            "Bulk validation applied",
+            extra={"validated": len(accepted), "not_in_guild": len(missing), "invalid": len(errors)},
+        )
+
+        lines = [f"Validated {len(accepted)} user(s). Added to whitelist and banned until VC join."]
+        if missing:
+            lines.append(f"Not in guild ({len(missing)}): " + ", ".join(str(m) for m in missing[:BULK_REPORT_LIMIT]))
+        if errors:
+            lines.append(f"Rejected lines ({len(errors)}):")
+            lines.extend(errors[:BULK_REPORT_LIMIT])
+        if len(missing) > BULK_REPORT_LIMIT or len(errors) > BULK_REPORT_LIMIT:
+            lines.append(f"(lists truncated to {BULK_REPORT_LIMIT} entries)")
+        await ctx.reply("\n".join(lines)[:2000])
+
+    @commands.command(name="reconcile")
+    async def reconcile(self, ctx: commands.Context, mode: str = ""):
+        if not self._is_admin(ctx.author):
+            await ctx.reply("You do not have permission to run reconciliation.")
+            return
+        report = await self.reconciler.run(dry_run=mode.lower() in ("dry", "dry-run", "check"))
+        await ctx.reply(report.summary()[:2000])
+
+    @commands.command(name="profile")
+    async def profile(self, ctx: commands.Context, seconds: float = DEFAULT_PROFILE_SECONDS):
+        if not self._is_admin(ctx.author):
+            await ctx.reply("You do not have permission to profile the bot.")
+            return
+        seconds = min(max(seconds, 1.0), MAX_PROFILE_SECONDS)
+        await ctx.reply(f"Profiling the event loop for {seconds:g}s; results go to the bot spam channel.")
+        try:
+            top, full = await capture_profile(seconds)
+        except RuntimeError as exc:
+            await ctx.reply(str(exc))
+            return
+        logger.info("Profile captured", extra={"seconds": seconds, "by": str(ctx.author)})
+        channel = self.get_channel(self.config.bot_spam_channel_id)
+        if channel is None:
+            return
+        lag = f" Max loop lag so far: {self.watchdog.max_lag * 1000:.0f} ms." if self.watchdog else ""
+        header = f"Profile requested by {ctx.author.mention} ({seconds:g}s).{lag}\n"
+        # Keep the message under Discord's 2000-char limit; the full report is attached.
+        body = top[: 2000 - len(header) - 8]
+        await channel.send(
+            header + "```\n" + body + "\n```",
+            file=discord.File(io.BytesIO(full.encode()), filename="profile.txt"),
+        )
+
+    @commands.command(name="stats")
+    async def stats(self, ctx: commands.Context, member: Optional[discord.Member] = None):
+        member = member or ctx.author
+        user = self.user_service.get_by_discord(member.id)
+        stats = self.player_stats.get(user.steam64) if user else None
+        if not stats:
+            await ctx.reply(f"No recorded deaths for {member.mention}.")
+            return
+        await ctx.reply(
+            f"{member.mention}: {stats.deaths} death(s), longest life {_format_duration(stats.longest_life)}, "
+            f"median life {_format_duration(stats.median_life)}, "
+            f"total survived {_format_duration(stats.total_alive)}, {stats.deaths_per_week():.1f} deaths/week."
+        )
+
+    @commands.command(name="leaderboard")
+    async def leaderboard(self, ctx: commands.Context, board: str = "longest"):
+        board = board.lower()
+        if board not in BOARDS:
+            await ctx.reply(f"Unknown leaderboard `{board}`. Pick one of: {', '.join(BOARDS)}.")
+            return
+        entries = self.player_stats.leaderboard(board, LEADERBOARD_SIZE)
+        if not entries:
+            await ctx.reply("No deaths recorded yet.")
+            return
+        lines = [f"Leaderboard: {board}"]
+        for rank, (steam64, value) in enumerate(entries, 1):
+            user = self.user_service.get(steam64)
+            who = f"<@{user.discordId}>" if user else steam64
+            shown = str(int(value)) if board == "deaths" else _format_duration(value)
+            lines.append(f"{rank}. {who} {shown}")
+        await ctx.reply("\n".join(lines), allowed_mentions=discord.AllowedMentions.none())
+
     async def on_member_update(self, before: discord.Member, after: discord.Member):
+        self.members.remember(after)
         # Admin override via Alive role grant
+        if before.roles == after.roles:
+            return
         before_alive = self.config.alive_role_id in [r.id for r in before.roles]
         after_alive = self.config.alive_role_id in [r.id for r in after.roles]
         if after_alive and not before_alive:
@@ -114,10 +385,13 @@ class DeathWatcherBot(commands.Bot):
                 self.user_service.mark_revive(user.steam64)
                 self.user_service.save()
                 self.banlist_service.remove_ban(user.steam64)
-                await self._swap_roles_on_revive(after)
-                await self._log_to_spam(f"{after.mention} revived by admin override")
+                self._swap_roles_on_revive(after)
+                self._log_to_spam(f"{after.mention} revived by admin override")
 
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        # Mute/deafen/stream toggles and members outside the DB are the bulk of the traffic.
+        if before.channel == after.channel:
+            return
         user = self.user_service.get_by_discord(member.id)
         if not user or not user.validatedAt:
             return
@@ -125,26 +399,52 @@ class DeathWatcherBot(commands.Bot):
         join_channel = self.config.join_vc_id
         # Joining click-to-join
         if after.channel and after.channel.id == join_channel:
-            if user.isDead and user.deadUntil:
-                dead_until = datetime.fromisoformat(user.deadUntil)
-                if dead_until > datetime.now(timezone.utc):
-                    await self._log_to_spam(
-                        f"{member.mention} attempted to join while dead until {dead_until.isoformat()}"
-                    )
-                    return
+            if user.isDead and user.deadUntilTs and user.deadUntilTs > time.time():
+                self._log_to_spam(f"{member.mention} attempted to join while dead until {user.deadUntil}")
+                return
             private_channel = await self._get_or_create_private_vc(member, user)
             await member.move_to(private_channel, reason="DayZ join flow")
-            self.banlist_service.remove_ban(user.steam64)
+            self.voice_sessions.joined(user.steam64)
             return
 
-        # Leaving private VC
-        if before.channel and user.privateVcId and before.channel.id == user.privateVcId:
+        # Back in the private VC, e.g. a reconnect inside the grace period
+        if after.channel and user.privateVcId and after.channel.id == user.privateVcId:
+            self.voice_sessions.joined(user.steam64)
+            return
+
+        # Leaving private VC; the ban and channel release wait for the grace period.
+        if before.channel and self.user_service.get_by_private_vc(before.channel.id) is user:
             if not after.channel or after.channel.id != join_channel:
-                self.banlist_service.add_ban(user.steam64)
-                if before.channel and len(before.channel.members) == 0:
-                    await before.channel.delete(reason="Private VC cleanup")
-                    user.privateVcId = None
-                    self.user_service.save()
+                self.voice_sessions.left(user.steam64, before.channel)
+
+    async def _commit_voice_sessions(self, sessions: List[SettledSession]) -> None:
+        unban = []
+        for session in sessions:
+            user = self.user_service.get(session.steam64)
+            # A death can land between the join and its commit; it keeps the ban.
+            if session.present and user and not user.isDead:
+                unban.append(session.steam64)
+        ban = [s.steam64 for s in sessions if not s.present]
+        self.banlist_service.apply_batch(ban=ban, unban=unban)
+
+        cleared = False
+        try:
+            for session in sessions:
+                channel = session.channel
+                if channel is None or len(channel.members) > 0:
+                    continue
+                owner = self.user_service.get_by_private_vc(channel.id)
+                if owner is not None:
+                    self.user_service.clear_private_vc(owner)
+                    cleared = True
+                try:
+                    await self.vc_pool.release(channel)
+                except discord.HTTPException:
+                    # One channel Discord refuses must not strand the rest of the batch.
+                    logger.warning("Failed to release private VC", extra={"channel_id": channel.id}, exc_info=True)
+        finally:
+            if cleared:
+                self.user_service.save()
 
     async def _get_or_create_private_vc(self, member: discord.Member, user) -> discord.VoiceChannel:
         guild = member.guild
@@ -152,43 +452,65 @@ class DeathWatcherBot(commands.Bot):
         if user.privateVcId:
             channel = guild.get_channel(user.privateVcId)
         if channel is None:
-            category = guild.get_channel(self.config.online_category_id)
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(connect=False, view_channel=False),
-                member: discord.PermissionOverwrite(connect=True, view_channel=True, speak=True),
-            }
-            channel = await guild.create_voice_channel(
-                name=f"{member.id}",
-                category=category,
-                overwrites=overwrites,
-                reason="DayZ private VC",
-            )
-            user.privateVcId = channel.id
+            channel = await self.vc_pool.acquire(member)
+            self.user_service.assign_private_vc(user, channel.id)
             self.user_service.save()
         return channel
 
-    @tasks.loop(minutes=1)
     async def revive_task(self):
-        now = datetime.now(timezone.utc)
-        for user in list(self.user_service.users.values()):
-            if user.isDead and user.deadUntil:
-                try:
-                    dead_until = datetime.fromisoformat(user.deadUntil)
-                except ValueError:
-                    continue
-                if dead_until <= now:
-                    user.isDead = False
-                    user.deadUntil = None
-                    self.user_service.save()
-                    self.banlist_service.remove_ban(user.steam64)
-                    member = await self._fetch_member(user.discordId)
-                    if member:
-                        await self._swap_roles_on_revive(member)
-                        await self._log_to_spam(f"{member.mention} revived (timer)")
-
-    @revive_task.before_loop
-    async def before_revive_task(self):
         await self.wait_until_ready()
+        while not self.is_closed():
+            due = await self.user_service.revive_schedule.wait_due()
+            try:
+                await self._revive_batch(due)
+            except Exception:
+                logger.exception("Revive batch failed", extra={"count": len(due)})
+
+    async def _revive_batch(self, steam64s: List[str]) -> None:
+        with REVIVE_BATCH.time():
+            await self._revive_users(steam64s)
+
+    async def _revive_users(self, steam64s: List[str]) -> None:
+        now = time.time()
+        for steam64 in steam64s:
+            user = self.user_service.get(steam64)
+            if user and user.deadUntilTs is not None:
+                REVIVE_DELAY.observe(max(0.0, now - user.deadUntilTs))
+        revived = [user for user in map(self.user_service.mark_revive, steam64s) if user]
+        if not revived:
+            return
+        REVIVES.inc(amount=len(revived))
+        self.user_service.save()
+        for user in revived:
+            self.banlist_service.remove_ban(user.steam64)
+        for user in revived:
+            member = await self._fetch_member(user.discordId)
+            if member:
+                self._swap_roles_on_revive(member)
+                self._log_to_spam(f"{member.mention} revived (timer)")
+
+    async def reconcile_task(self):
+        await self.wait_until_ready()
+        await self.reconciler.run_forever(self.config.reconcile_interval_minutes * 60)
+
+
+def _rcon_delivery(server: ServerConfig) -> Optional[RconBanDelivery]:
+    if not server.rcon_port:
+        return None
+    client = BattlEyeRconClient(server.rcon_host, server.rcon_port, server.rcon_password)
+    return RconBanDelivery(client, name=server.name)
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes = rest // 60
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m {seconds % 60}s"
 
 
 async def run_bot(config: Config):
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class MemberResolver:
+    """Resolves guild members with as few REST calls as possible.
+
+    Lookups go LRU/TTL cache -> discord.py member cache -> ``fetch_member``. Members
+    that 404 are remembered as departed for ``negative_ttl`` seconds so repeated
+    deaths/revives of someone who left the guild do not keep hitting the API.
+    """
+
+    def __init__(
+        self,
+        client: discord.Client,
+        guild_id: int,
+        ttl: float = 600.0,
+        max_size: int = 5000,
+        negative_ttl: float = 900.0,
+    ) -> None:
+        self.client = client
+        self.guild_id = guild_id
+        self.ttl = ttl
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self._members: "OrderedDict[int, Tuple[float, discord.Member]]" = OrderedDict()
+        self._missing: Dict[int, float] = {}
+        self._guild: Optional[discord.Guild] = None
+        self._guild_expires = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.rest_fetches = 0
+
+    async def guild(self) -> Optional[discord.Guild]:
+        guild = self.client.get_guild(self.guild_id)
+        if guild is not None:
+            self._guild = guild
+            return guild
+        now = time.monotonic()
+        if self._guild is not None and self._guild_expires > now:
+            return self._guild
+        try:
+            self._guild = await self.client.fetch_guild(self.guild_id)
+        except discord.HTTPException:
+            logger.warning("Failed to fetch guild", extra={"guild_id": self.guild_id})
+            return self._guild
+        self._guild_expires = now + self.ttl
+        return self._guild
+
+    async def prefetch(self) -> None:
+        guild = self.client.get_guild(self.guild_id)
+        if guild is None:
+            return
+        if not guild.chunked:
+            await guild.chunk()
+        logger.info("Guild members prefetched", extra={"count": guild.member_count})
+
+    async def resolve(self, discord_id: int) -> Optional[discord.Member]:
+        now = time.monotonic()
+        cached = self._members.get(discord_id)
+        if cached is not None and cached[0] > now:
+            self._members.move_to_end(discord_id)
+            self.hits += 1
+            return cached[1]
+        missing_until = self._missing.get(discord_id)
+        if missing_until is not None:
+            if missing_until > now:
+                self.hits += 1
+                return None
+            del self._missing[discord_id]
+
+        self.misses += 1
+        guild = await self.guild()
+        if guild is None:
+            return None
+        member = guild.get_member(discord_id)
+        if member is None:
+            self.rest_fetches += 1
+            try:
+                member = await guild.fetch_member(discord_id)
+            except discord.NotFound:
+                self.forget(discord_id, departed=True)
+                return None
+            except discord.HTTPException:
+                logger.warning("Failed to fetch member", extra={"discord_id": discord_id})
+                return None
+        self.remember(member)
+        return member
+
+    async def resolve_many(self, discord_ids: Iterable[int], batch_size: int = 100) -> Dict[int, discord.Member]:
+        # Cache and discord.py's member cache first; the rest is asked for over the
+        # gateway in batches of up to 100 IDs instead of one REST call per member.
+        resolved: Dict[int, discord.Member] = {}
+        guild = await self.guild()
+        if guild is None:
+            return resolved
+        now = time.monotonic()
+        unresolved = []
+        for discord_id in dict.fromkeys(discord_ids):
+            cached = self._members.get(discord_id)
+            member = cached[1] if cached is not None and cached[0] > now else guild.get_member(discord_id)
+            if member is not None:
+                resolved[discord_id] = member
+            else:
+                unresolved.append(discord_id)
+        for start in range(0, len(unresolved), batch_size):
+            batch = unresolved[start:start + batch_size]
+            try:
+                found = await guild.query_members(user_ids=batch, limit=len(batch), cache=True)
+            except (asyncio.TimeoutError, discord.ClientException):
+                logger.warning("Member batch query failed", extra={"count": len(batch)})
+                continue
+            for member in found:
+                resolved[member.id] = member
+        for member in resolved.values():
+            self.remember(member)
+        return resolved
+
+    def remember(self, member: discord.Member) -> None:
+        self._missing.pop(member.id, None)
+        self._members[member.id] = (time.monotonic() + self.ttl, member)
+        self._members.move_to_end(member.id)
+        while len(self._members) > self.max_size:
+            self._members.popitem(last=False)
+
+    def forget(self, discord_id: int, departed: bool = False) -> None:
+        self._members.pop(discord_id, None)
+        if not departed:
+            return
+        now = time.monotonic()
+        if len(self._missing) >= self.max_size:
+            self._missing = {k: v for k, v in self._missing.items() if v > now}
+            while len(self._missing) >= self.max_size:
+                del self._missing[next(iter(self._missing))]
+        self._missing[discord_id] = now + self.negative_ttl
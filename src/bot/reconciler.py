@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+import discord
+
+from bot.action_scheduler import DiscordActionScheduler
+from bot.member_resolver import MemberResolver
+from config import Config
+from services.banlist_service import BanlistFanout
+from services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+# Role repairs go through the paced action queue; anything past this is left for the
+# next run so one large drift cannot monopolise the queue for hours.
+MAX_ROLE_REPAIRS_PER_RUN = 500
+
+
+@dataclass
+class DriftReport:
+    users_checked: int = 0
+    members_missing: int = 0
+    dead_roles_fixed: int = 0
+    alive_roles_fixed: int = 0
+    role_repairs_deferred: int = 0
+    banned: int = 0
+    unbanned: int = 0
+    whitelisted: int = 0
+    overdue_revives: int = 0
+    untracked_dead_role: int = 0
+    duration_ms: float = 0.0
+    dry_run: bool = False
+    samples: List[str] = field(default_factory=list)
+
+    @property
+    def drift(self) -> int:
+        return (
+            self.dead_roles_fixed
+            + self.alive_roles_fixed
+            + self.role_repairs_deferred
+            + self.banned
+            + self.unbanned
+            + self.whitelisted
+            + self.overdue_revives
+        )
+
+    def summary(self) -> str:
+        verb = "found" if self.dry_run else "repaired"
+        lines = [
+            f"Reconciliation {verb} {self.drift} drift item(s) across {self.users_checked} user(s) in {self.duration_ms:.0f} ms.",
+            f"Roles: {self.dead_roles_fixed} to dead, {self.alive_roles_fixed} to alive, {self.role_repairs_deferred} deferred.",
+            f"Ban list: +{self.banned} / -{self.unbanned}; whitelist: +{self.whitelisted}.",
+            f"Overdue revives: {self.overdue_revives}. Not in guild: {self.members_missing}. "
+            f"Dead role without DB record: {self.untracked_dead_role}.",
+        ]
+        lines.extend(self.samples)
+        return "\n".join(lines)
+
+
+class Reconciler:
+    """Repairs drift between guild roles, the user DB and the ban/whitelist files.
+
+    One pass takes a snapshot of the three sources, computes the expected state from
+    the user DB with set operations and issues only the differences: role edits go to
+    the action scheduler, ban/whitelist changes are applied as one batch per file.
+    Ban entries for steam64s outside the DB, and alive users outside their private VC,
+    are left alone because both are legitimately managed by hand or by the join flow.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        user_service: UserService,
+        banlist_service: BanlistFanout,
+        actions: DiscordActionScheduler,
+        members: MemberResolver,
+    ) -> None:
+        self.config = config
+        self.user_service = user_service
+        self.banlist_service = banlist_service
+        self.actions = actions
+        self.members = members
+        self._lock = asyncio.Lock()
+        self.last_report: Optional[DriftReport] = None
+
+    async def run(self, dry_run: bool = False) -> DriftReport:
+        async with self._lock:
+            report = await self._run(dry_run)
+        self.last_report = report
+        logger.info(
+            "Reconciliation finished",
+            extra={"drift": report.drift, "users": report.users_checked, "dry_run": dry_run, "ms": round(report.duration_ms)},
+        )
+        return report
+
+    async def _run(self, dry_run: bool) -> DriftReport:
+        started = time.perf_counter()
+        report = DriftReport(dry_run=dry_run)
+        guild = await self.members.guild()
+        if guild is None:
+            raise RuntimeError("Guild not available")
+        if not guild.chunked:
+            await self.members.prefetch()
+
+        dead_role_id = self.config.dead_role_id
+        alive_role_id = self.config.alive_role_id
+        now = time.time()
+        tracked: Set[int] = set()
+        to_dead: List[discord.Member] = []
+        to_alive: List[discord.Member] = []
+        ban: Set[str] = set()
+        unban: Set[str] = set()
+        whitelist: Set[str] = set()
+        overdue: List[str] = []
+
+        for user in self.user_service.iter_users():
+            if user.validatedAtTs is None:
+                continue
+            report.users_checked += 1
+            tracked.add(user.discordId)
+            whitelist.add(user.steam64)
+            dead = user.isDead and user.deadUntilTs is not None and user.deadUntilTs > now
+            if user.isDead and not dead:
+                if user.steam64 not in self.user_service.revive_schedule:
+                    overdue.append(user.steam64)
+                continue
+            if dead:
+                ban.add(user.steam64)
+            member = guild.get_member(user.discordId)
+            if member is None:
+                report.members_missing += 1
+                continue
+            if dead:
+                if member.get_role(alive_role_id) is not None or member.get_role(dead_role_id) is None:
+                    to_dead.append(member)
+            else:
+                if member.get_role(dead_role_id) is not None:
+                    to_alive.append(member)
+                voice = member.voice
+                if voice and voice.channel and user.privateVcId and voice.channel.id == user.privateVcId:
+                    unban.add(user.steam64)
+
+        dead_role = guild.get_role(dead_role_id)
+        if dead_role is not None:
+            report.untracked_dead_role = sum(1 for m in dead_role.members if m.id not in tracked)
+
+        report.overdue_revives = len(overdue)
+        budget = MAX_ROLE_REPAIRS_PER_RUN
+        report.dead_roles_fixed = min(len(to_dead), budget)
+        report.alive_roles_fixed = min(len(to_alive), budget - report.dead_roles_fixed)
+        report.role_repairs_deferred = len(to_dead) + len(to_alive) - report.dead_roles_fixed - report.alive_roles_fixed
+        report.samples = [f"dead role missing: {m.mention}" for m in to_dead[:5]]
+        report.samples += [f"dead role on alive user: {m.mention}" for m in to_alive[:5]]
+
+        if dry_run:
+            current_banned = self.banlist_service.banned
+            report.banned = len(ban - current_banned)
+            report.unbanned = len(unban & current_banned)
+            report.whitelisted = len(whitelist - self.banlist_service.whitelist)
+        else:
+            changed = self.banlist_service.apply_batch(ban=ban, unban=unban, whitelist=whitelist)
+            report.banned = changed["banned"]
+            report.unbanned = changed["unbanned"]
+            report.whitelisted = changed["whitelisted"]
+            for member in to_dead[: report.dead_roles_fixed]:
+                self.actions.request_roles(
+                    member, add=[dead_role_id], remove=[alive_role_id], disconnect=True, reason="Reconciliation"
+                )
+            for member in to_alive[: report.alive_roles_fixed]:
+                self.actions.request_roles(member, add=[alive_role_id], remove=[dead_role_id], reason="Reconciliation")
+            for steam64 in overdue:
+                self.user_service.revive_schedule.schedule(steam64, now)
+
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        return report
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                report = await self.run()
+            except Exception:
+                logger.exception("Scheduled reconciliation failed")
+                continue
+            if report.drift:
+                self.actions.notify(report.summary())
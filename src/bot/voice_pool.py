@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord allows two name edits per channel every ten minutes, so pool channels are
+# never renamed: every private VC carries this name and only its overwrites change.
+POOL_CHANNEL_NAME = "private-vc"
+
+
+def _hidden_overwrites(guild: discord.Guild) -> Dict:
+    return {guild.default_role: discord.PermissionOverwrite(connect=False, view_channel=False)}
+
+
+def _is_unassigned(channel: discord.VoiceChannel) -> bool:
+    # An assigned channel carries an overwrite for its owner; an idle one only hides.
+    return not channel.members and not any(isinstance(target, discord.Member) for target in channel.overwrites)
+
+
+def _member_overwrites(guild: discord.Guild, member: discord.Member) -> Dict:
+    overwrites = _hidden_overwrites(guild)
+    overwrites[member] = discord.PermissionOverwrite(connect=True, view_channel=True, speak=True)
+    return overwrites
+
+
+class PrivateVoicePool:
+    """Keeps ``size`` hidden voice channels ready under the online category.
+
+    Handing a channel to a member is a single overwrites-only ``channel.edit``
+    instead of a ``create_voice_channel`` on the join path; released channels go
+    back to the pool, hidden again, and are only deleted when the pool is already
+    full. Channels are tracked by id and never renamed, which keeps reuse clear of
+    Discord's per-channel rename limit. A
+    background task tops the pool up, creating at most one channel every
+    ``refill_interval`` seconds to stay clear of the channel-create rate limit.
+    """
+
+    def __init__(self, category_id: int, size: int = 5, refill_interval: float = 2.0) -> None:
+        self.category_id = category_id
+        self.size = max(0, size)
+        self.refill_interval = refill_interval
+        self._idle: Deque[int] = deque()
+        self._guild: Optional[discord.Guild] = None
+        self._refill_needed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def stats(self) -> Dict[str, int]:
+        return {"idle": self.idle_count, "size": self.size, "hits": self.hits, "misses": self.misses}
+
+    def start(self, guild: discord.Guild) -> None:
+        self._guild = guild
+        if self._task is not None:
+            return
+        category = guild.get_channel(self.category_id)
+        if isinstance(category, discord.CategoryChannel):
+            # Adopt idle pool channels left over from a previous run.
+            for channel in category.voice_channels:
+                if channel.name == POOL_CHANNEL_NAME and _is_unassigned(channel) and channel.id not in self._idle:
+                    self._idle.append(channel.id)
+        logger.info("Voice channel pool started", extra={"idle": self.idle_count, "size": self.size})
+        self._task = asyncio.create_task(self._refill_loop())
+        self._refill_needed.set()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def acquire(self, member: discord.Member) -> discord.VoiceChannel:
+        guild = member.guild
+        while self._idle:
+            channel = guild.get_channel(self._idle.popleft())
+            if not isinstance(channel, discord.VoiceChannel) or channel.members:
+                continue
+            self._refill_needed.set()
+            try:
+                await channel.edit(overwrites=_member_overwrites(guild, member), reason="DayZ private VC")
+            except discord.NotFound:
+                continue
+            self.hits += 1
+            return channel
+        self.misses += 1
+        self._refill_needed.set()
+        return await guild.create_voice_channel(
+            name=POOL_CHANNEL_NAME,
+            category=guild.get_channel(self.category_id),
+            overwrites=_member_overwrites(guild, member),
+            reason="DayZ private VC",
+        )
+
+    async def release(self, channel: discord.VoiceChannel) -> None:
+        if len(self._idle) >= self.size:
+            await channel.delete(reason="Private VC cleanup")
+            return
+        await channel.edit(overwrites=_hidden_overwrites(channel.guild), reason="Private VC returned to pool")
+        self._idle.append(channel.id)
+
+    async def _refill_loop(self) -> None:
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+            while self._guild is not None and len(self._idle) < self.size:
+                try:
+                    channel = await self._guild.create_voice_channel(
+                        name=POOL_CHANNEL_NAME,
+                        category=self._guild.get_channel(self.category_id),
+                        overwrites=_hidden_overwrites(self._guild),
+                        reason="Private VC pool refill",
+                    )
+                except discord.HTTPException:
+                    logger.warning("Voice pool refill failed", exc_info=True)
+                    await asyncio.sleep(self.refill_interval * 10)
+                    continue
+                self._idle.append(channel.id)
+                await asyncio.sleep(self.refill_interval)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SettledSession:
+    steam64: str
+    present: bool
+    # The private channel that was left; only set for settled leaves.
+    channel: Optional[discord.VoiceChannel] = None
+
+
+@dataclass
+class _Session:
+    steam64: str
+    present: bool
+    due: float
+    channel: Optional[discord.VoiceChannel] = None
+
+
+CommitCallback = Callable[[List[SettledSession]], Awaitable[None]]
+
+
+class VoiceSessionTracker:
+    """Debounces private-VC joins and leaves into settled ban/unban decisions.
+
+    A join settles on the next batch; a leave only settles once the member has
+    stayed out for ``grace`` seconds, so a leave followed by a rejoin inside the
+    window never reaches ban.txt and never gives the channel back. Everything that
+    settles within ``batch_window`` is handed to ``commit`` in one call.
+    """
+
+    def __init__(self, commit: CommitCallback, grace: float = 30.0, batch_window: float = 1.0) -> None:
+        self.commit = commit
+        self.grace = grace
+        self.batch_window = batch_window
+        self._sessions: Dict[str, _Session] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flaps_absorbed = 0
+        self.batches_committed = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "flaps_absorbed": self.flaps_absorbed,
+            "batches_committed": self.batches_committed,
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Shutting down: whatever is pending is as settled as it will get.
+        await self._commit_due(float("inf"))
+
+    def joined(self, steam64: str) -> None:
+        session = self._sessions.get(steam64)
+        if session is not None and not session.present:
+            self.flaps_absorbed += 1
+        self._sessions[steam64] = _Session(steam64, True, self._now())
+        self._wakeup.set()
+
+    def left(self, steam64: str, channel: Optional[discord.VoiceChannel]) -> None:
+        self._sessions[steam64] = _Session(steam64, False, self._now() + self.grace, channel)
+        self._wakeup.set()
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._sessions:
+                await self._wakeup.wait()
+            self._wakeup.clear()
+            deadline = self._next_due() + self.batch_window
+            # New sessions can only pull the deadline forward, so a stream of joins
+            # cannot keep postponing a batch.
+            while (remaining := deadline - self._now()) > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+                deadline = min(deadline, self._next_due() + self.batch_window)
+            try:
+                await self._commit_due(self._now())
+            except Exception:
+                logger.exception("Voice session commit failed")
+
+    def _next_due(self) -> float:
+        return min((s.due for s in self._sessions.values()), default=float("inf"))
+
+    async def _commit_due(self, now: float) -> None:
+        settled = [s for s in self._sessions.values() if s.due <= now]
+        if not settled:
+            return
+        for session in settled:
+            del self._sessions[session.steam64]
+        self.batches_committed += 1
+        await self.commit(
+            [SettledSession(s.steam64, s.present, None if s.present else s.channel) for s in settled]
+        )
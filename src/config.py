@@ -1,9 +1,41 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ServerConfig:
+    name: str
+    path_to_logs_directory: Path
+    path_to_cache: Path
+    ban_txt_path: Path
+    whitelist_txt_path: Path
+    # BattlEye RCon; leave rcon_port at 0 to rely on ban.txt alone.
+    rcon_host: str = "127.0.0.1"
+    rcon_port: int = 0
+    rcon_password: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], index: int = 0) -> "ServerConfig":
+        return cls(
+            name=str(data.get("name") or f"server{index + 1}"),
+            path_to_logs_directory=Path(data["path_to_logs_directory"]),
+            path_to_cache=Path(data["path_to_cache"]),
+            ban_txt_path=Path(data["ban_txt_path"]),
+            whitelist_txt_path=Path(data["whitelist_txt_path"]),
+            rcon_host=str(data.get("rcon_host", "127.0.0.1")),
+            rcon_port=int(data.get("rcon_port", 0)),
+            rcon_password=str(data.get("rcon_password", "")),
+        )
+
+    def ensure_paths(self) -> None:
+        self.path_to_logs_directory.mkdir(parents=True, exist_ok=True)
+        self.path_to_cache.parent.mkdir(parents=True, exist_ok=True)
+        self.ban_txt_path.parent.mkdir(parents=True, exist_ok=True)
+        self.whitelist_txt_path.parent.mkdir(parents=True, exist_ok=True)
 
 
 @dataclass
@@ -23,10 +55,45 @@ class Config:
     whitelist_txt_path: Path
     ban_duration_days: int = 3
     verbose_logs: bool = False
+    write_coalesce_ms: int = 250
+    userdata_backend: str = "json"
+    userdata_sqlite_path: Optional[Path] = None
+    userdata_snapshot_path: Optional[Path] = None
+    enforcement_workers: int = 4
+    enforcement_queue_size: int = 256
+    discord_action_coalesce_ms: int = 500
+    discord_actions_per_second: float = 5.0
+    spam_digest_seconds: float = 10.0
+    member_cache_ttl_seconds: float = 600.0
+    member_cache_size: int = 5000
+    member_negative_ttl_seconds: float = 900.0
+    vc_pool_size: int = 5
+    vc_pool_refill_seconds: float = 2.0
+    cursor_checkpoint_seconds: float = 30.0
+    cursor_checkpoint_events: int = 5000
+    dedupe_ttl_hours: float = 72.0
+    reconcile_interval_minutes: float = 30.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0
+    loop_lag_threshold_ms: int = 250
+    player_stats_path: Optional[Path] = None
+    voice_grace_seconds: float = 30.0
+    voice_commit_batch_ms: int = 1000
+    rcon_host: str = "127.0.0.1"
+    rcon_port: int = 0
+    rcon_password: str = ""
+    # One entry per DayZ server; a config without "servers" describes a single server
+    # through the top-level path keys. The top-level path fields mirror servers[0].
+    servers: List[ServerConfig] = field(default_factory=list)
 
     @classmethod
     def load(cls, path: Path) -> "Config":
         data = json.loads(Path(path).read_text())
+        servers = [ServerConfig.from_dict(s, i) for i, s in enumerate(data.get("servers") or [])]
+        if servers:
+            primary = asdict(servers[0])
+            for key in ("path_to_logs_directory", "path_to_cache", "ban_txt_path", "whitelist_txt_path"):
+                data.setdefault(key, str(primary[key]))
         return cls(
             token=data["token"],
             guild_id=int(data["guild_id"]),
@@ -43,19 +110,81 @@ class Config:
             whitelist_txt_path=Path(data["whitelist_txt_path"]),
             ban_duration_days=int(data.get("ban_duration_days", 3)),
             verbose_logs=bool(data.get("verbose_logs", False)),
+            write_coalesce_ms=int(data.get("write_coalesce_ms", 250)),
+            userdata_backend=str(data.get("userdata_backend", "json")).lower(),
+            userdata_sqlite_path=Path(data["userdata_sqlite_path"]) if data.get("userdata_sqlite_path") else None,
+            userdata_snapshot_path=Path(data["userdata_snapshot_path"]) if data.get("userdata_snapshot_path") else None,
+            enforcement_workers=int(data.get("enforcement_workers", 4)),
+            enforcement_queue_size=int(data.get("enforcement_queue_size", 256)),
+            discord_action_coalesce_ms=int(data.get("discord_action_coalesce_ms", 500)),
+            discord_actions_per_second=float(data.get("discord_actions_per_second", 5.0)),
+            spam_digest_seconds=float(data.get("spam_digest_seconds", 10.0)),
+            member_cache_ttl_seconds=float(data.get("member_cache_ttl_seconds", 600.0)),
+            member_cache_size=int(data.get("member_cache_size", 5000)),
+            member_negative_ttl_seconds=float(data.get("member_negative_ttl_seconds", 900.0)),
+            vc_pool_size=int(data.get("vc_pool_size", 5)),
+            vc_pool_refill_seconds=float(data.get("vc_pool_refill_seconds", 2.0)),
+            cursor_checkpoint_seconds=float(data.get("cursor_checkpoint_seconds", 30.0)),
+            cursor_checkpoint_events=int(data.get("cursor_checkpoint_events", 5000)),
+            dedupe_ttl_hours=float(data.get("dedupe_ttl_hours", 72.0)),
+            reconcile_interval_minutes=float(data.get("reconcile_interval_minutes", 30.0)),
+            metrics_host=str(data.get("metrics_host", "127.0.0.1")),
+            metrics_port=int(data.get("metrics_port", 0)),
+            loop_lag_threshold_ms=int(data.get("loop_lag_threshold_ms", 250)),
+            player_stats_path=Path(data["player_stats_path"]) if data.get("player_stats_path") else None,
+            voice_grace_seconds=float(data.get("voice_grace_seconds", 30.0)),
+            voice_commit_batch_ms=int(data.get("voice_commit_batch_ms", 1000)),
+            rcon_host=str(data.get("rcon_host", "127.0.0.1")),
+            rcon_port=int(data.get("rcon_port", 0)),
+            rcon_password=str(data.get("rcon_password", "")),
+            servers=servers,
         )
 
+    def __post_init__(self) -> None:
+        if self.userdata_backend not in ("json", "sqlite"):
+            raise ValueError(f"Unknown userdata_backend: {self.userdata_backend!r}")
+        if self.userdata_sqlite_path is None:
+            self.userdata_sqlite_path = self.userdata_db_path.with_suffix(".sqlite3")
+        if self.player_stats_path is None:
+            self.player_stats_path = self.userdata_db_path.with_name("player_deaths.bin")
+        if not self.servers:
+            self.servers = [
+                ServerConfig(
+                    name="default",
+                    path_to_logs_directory=self.path_to_logs_directory,
+                    path_to_cache=self.path_to_cache,
+                    ban_txt_path=self.ban_txt_path,
+                    whitelist_txt_path=self.whitelist_txt_path,
+                    rcon_host=self.rcon_host,
+                    rcon_port=self.rcon_port,
+                    rcon_password=self.rcon_password,
+                )
+            ]
+        names = [s.name for s in self.servers]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate server names: {names}")
+        caches = [s.path_to_cache.resolve() for s in self.servers]
+        if len(set(caches)) != len(caches):
+            raise ValueError("Each server needs its own path_to_cache")
+
     def ensure_paths(self) -> None:
-        self.path_to_logs_directory.mkdir(parents=True, exist_ok=True)
         self.userdata_db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.path_to_cache.parent.mkdir(parents=True, exist_ok=True)
-        self.ban_txt_path.parent.mkdir(parents=True, exist_ok=True)
-        self.whitelist_txt_path.parent.mkdir(parents=True, exist_ok=True)
+        self.userdata_sqlite_path.parent.mkdir(parents=True, exist_ok=True)
+        self.player_stats_path.parent.mkdir(parents=True, exist_ok=True)
+        for server in self.servers:
+            server.ensure_paths()
 
     def to_sanitized_dict(self) -> Dict[str, Any]:
         result = self.__dict__.copy()
         result["token"] = "***redacted***"
+        result["rcon_password"] = "***redacted***" if self.rcon_password else ""
         for key, value in list(result.items()):
             if isinstance(value, Path):
                 result[key] = str(value)
+        result["servers"] = [
+            {k: str(v) if isinstance(v, Path) else v for k, v in asdict(server).items()} for server in self.servers
+        ]
+        for server in result["servers"]:
+            if server["rcon_password"]:
+                server["rcon_password"] = "***redacted***"
         return result
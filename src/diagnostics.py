@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import traceback
+from typing import Optional, Tuple
+
+from metrics import LOOP_LAG, LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 120.0
+
+
+class LoopLagWatchdog:
+    """Measures event-loop scheduling lag and reports what is blocking the loop.
+
+    A coroutine on the loop sleeps ``interval`` seconds at a time and records how late
+    it wakes up. A daemon thread checks that heartbeat; once it is ``threshold``
+    seconds stale, the loop thread is stuck in a callback, and the thread logs that
+    callback's current stack while it is still running.
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.1) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._beat = now
+            LOOP_LAG.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag >= self.threshold:
+                logger.warning("Event loop lag", extra={"lag_ms": round(lag * 1000)})
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            stalled_for = time.monotonic() - beat - self.interval
+            if stalled_for < self.threshold or beat == reported_beat:
+                continue
+            # One report per stall: the heartbeat has not moved since we last looked.
+            reported_beat = beat
+            self.stalls += 1
+            LOOP_STALLS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<no frame>"
+            logger.warning(
+                "Event loop blocked; stack of the running callback follows\n%s",
+                stack,
+                extra={"blocked_ms": round(stalled_for * 1000)},
+            )
+
+
+_profile_lock = asyncio.Lock()
+
+
+async def capture_profile(seconds: float, limit: int = 15) -> Tuple[str, str]:
+    """Profile the event-loop thread for ``seconds`` and return (top hot spots, full report).
+
+    Nothing is hooked in between captures; cProfile is only enabled for the window.
+    """
+    seconds = min(max(seconds, 1.0), MAX_PROFILE_SECONDS)
+    if _profile_lock.locked():
+        raise RuntimeError("A profile is already being captured")
+    async with _profile_lock:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+
+    full = io.StringIO()
+    stats = pstats.Stats(profile, stream=full)
+    stats.sort_stats("cumulative").print_stats(100)
+    top = io.StringIO()
+    pstats.Stats(profile, stream=top).strip_dirs().sort_stats("tottime").print_stats(limit)
+    return _trim_report(top.getvalue()), full.getvalue()
+
+
+def _trim_report(text: str) -> str:
+    # Drop pstats' preamble down to the column header so the table fits in a message.
+    lines = text.strip().splitlines()
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("ncalls"):
+            return "\n".join(lines[i:])
+    return "\n".join(lines)
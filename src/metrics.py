@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Minimal Prometheus text-format metrics. Recording is a dict lookup plus an integer
+# add (a bisect for histograms), so it is safe on the hot path; values that are cheap
+# to read but expensive to push (tail lag, queue depths) are collected at scrape time.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Set on death payloads by the log tailer; downstream stages are timed from it.
+PARSED_AT = "_parsedAt"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _Sampled(_Metric):
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._collect: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set_function(self, collect: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+        """Read samples (label tuple -> value) from ``collect`` at scrape time."""
+        self._collect = collect
+
+    def collect(self) -> List[str]:
+        values = dict(self._values)
+        if self._collect is not None:
+            try:
+                values.update(self._collect())
+            except Exception:
+                logger.exception("Metric collector failed", extra={"metric": self.name})
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in values.items()]
+
+
+class Counter(_Sampled):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Sampled):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def collect(self) -> List[str]:
+        lines: List[str] = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(
+        self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            samples = metric.collect()
+            if samples:
+                lines.extend(metric.header())
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LOG_LINES = REGISTRY.counter("deathwatcher_log_lines_total", "Log lines parsed by the tailer.", ["server"])
+LOG_BYTES = REGISTRY.counter("deathwatcher_log_bytes_read_total", "Log bytes read by the tailer.", ["server"])
+TAIL_LAG = REGISTRY.gauge("deathwatcher_tail_lag_bytes", "Active log file size minus the tailer offset.", ["server"])
+DEATH_STAGE = REGISTRY.histogram(
+    "deathwatcher_death_stage_seconds",
+    "Death enforcement latency. ingest is log ts to parse; the other stages are measured from parse.",
+    ["stage"],
+)
+PIPELINE_DEPTH = REGISTRY.gauge("deathwatcher_pipeline_depth", "Deaths queued for enforcement.")
+ACTION_QUEUE_DEPTH = REGISTRY.gauge("deathwatcher_discord_action_queue_depth", "Members with pending role edits.")
+DISCORD_EDITS = REGISTRY.counter("deathwatcher_discord_edits_total", "Coalesced member edits sent to Discord.")
+DISCORD_ACTIONS_MERGED = REGISTRY.counter(
+    "deathwatcher_discord_actions_merged_total", "Role and voice actions folded into an already pending edit."
+)
+DISCORD_PACING_WAIT = REGISTRY.counter(
+    "deathwatcher_discord_pacing_wait_seconds_total", "Time the action queue spent pacing edits to actions_per_second."
+)
+VC_POOL_IDLE = REGISTRY.gauge("deathwatcher_vc_pool_idle", "Pre-created private voice channels ready to hand out.")
+VC_POOL_REQUESTS = REGISTRY.counter(
+    "deathwatcher_vc_pool_requests_total", "Private voice channel requests, by whether the pool had one ready.", ["result"]
+)
+DISCORD_CALL = REGISTRY.histogram(
+    "deathwatcher_discord_request_seconds", "Discord HTTP request latency by route.", ["method", "route", "status"]
+)
+FILE_WRITE = REGISTRY.histogram(
+    "deathwatcher_file_write_seconds", "Atomic file write duration, including I/O pool queueing.", ["file"], FAST_BUCKETS
+)
+REVIVE_BATCH = REGISTRY.histogram("deathwatcher_revive_batch_seconds", "Duration of one revive_task batch.")
+REVIVE_DELAY = REGISTRY.histogram("deathwatcher_revive_delay_seconds", "Time from deadUntil to the revive being applied.")
+REVIVES = REGISTRY.counter("deathwatcher_revives_total", "Players revived by the timer.")
+RCON_COMMAND = REGISTRY.histogram(
+    "deathwatcher_rcon_command_seconds", "BattlEye RCon round trip by server and command.", ["server", "command"]
+)
+LOOP_LAG = REGISTRY.histogram(
+    "deathwatcher_event_loop_lag_seconds", "How late the event loop ran a timer callback.", buckets=FAST_BUCKETS
+)
+LOOP_STALLS = REGISTRY.counter("deathwatcher_event_loop_stalls_total", "Callbacks that blocked the event loop.")
+
+
+def observe_stage(payload: dict, stage: str) -> None:
+    parsed_at = payload.get(PARSED_AT)
+    if parsed_at is not None:
+        DEATH_STAGE.observe(time.monotonic() - parsed_at, stage)
+
+
+class MetricsServer:
+    """Serves ``GET /metrics`` from a registry over plain asyncio streams."""
+
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY) -> None:
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Metrics endpoint listening", extra={"host": self.host, "port": self.port})
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5.0)
+            # Headers are not needed; read them off so the client sees a clean close.
+            while (await asyncio.wait_for(reader.readline(), 5.0)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+                status, body = "200 OK", self.registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
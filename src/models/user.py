@@ -1,33 +1,89 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Optional
 
 
-@dataclass
+def iso_to_epoch(value: object) -> Optional[float]:
+    """Epoch seconds of an ISO-8601 string, or None for anything else.
+
+    A time without an offset is taken as UTC, like the DayZ log timestamps.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _iso_to_seconds(value: object) -> Optional[int]:
+    epoch = iso_to_epoch(value)
+    return int(epoch) if epoch is not None else None
+
+
+def epoch_to_iso(value: Optional[int]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+
+def _opt_int(value: object) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
 class UserRecord:
+    # The deadlines are kept as integer epoch seconds; the ISO-string properties below
+    # keep the users.json schema (and older call sites) unchanged. lastDeathAt is only
+    # displayed, so it stays the log's own timestamp string.
     steam64: str
     discordId: int
-    validatedAt: Optional[str] = None
+    validatedAtTs: Optional[int] = None
     isDead: bool = False
-    deadUntil: Optional[str] = None
+    deadUntilTs: Optional[int] = None
     lastAliveSec: Optional[int] = None
     lastDeathAt: Optional[str] = None
     privateVcId: Optional[int] = None
     lastVoiceState: Optional[str] = None
 
+    @property
+    def validatedAt(self) -> Optional[str]:
+        return epoch_to_iso(self.validatedAtTs)
+
+    @validatedAt.setter
+    def validatedAt(self, value: Optional[str]) -> None:
+        self.validatedAtTs = _iso_to_seconds(value)
+
+    @property
+    def deadUntil(self) -> Optional[str]:
+        return epoch_to_iso(self.deadUntilTs)
+
+    @deadUntil.setter
+    def deadUntil(self, value: Optional[str]) -> None:
+        self.deadUntilTs = _iso_to_seconds(value)
+
     @classmethod
     def from_dict(cls, data: dict) -> "UserRecord":
+        last_death = data.get("lastDeathAt")
         return cls(
             steam64=str(data["steam64"]),
             discordId=int(data["discordId"]),
-            validatedAt=data.get("validatedAt"),
+            validatedAtTs=_iso_to_seconds(data.get("validatedAt")),
             isDead=bool(data.get("isDead", False)),
-            deadUntil=data.get("deadUntil"),
-            lastAliveSec=data.get("lastAliveSec"),
-            lastDeathAt=data.get("lastDeathAt"),
-            privateVcId=data.get("privateVcId"),
+            deadUntilTs=_iso_to_seconds(data.get("deadUntil")),
+            lastAliveSec=_opt_int(data.get("lastAliveSec")),
+            lastDeathAt=last_death if isinstance(last_death, str) else None,
+            privateVcId=_opt_int(data.get("privateVcId")) or None,
             lastVoiceState=data.get("lastVoiceState"),
         )
 
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import struct
+from typing import Dict, Iterable
+
+from models.user import UserRecord
+
+# Binary snapshot of the user DB for fast startup. Layout (little endian):
+#   header:  magic "MMUS", u16 version, u32 record count
+#   record:  i64 discordId, i64 validatedAtTs, i64 deadUntilTs, i64 lastAliveSec,
+#            i64 privateVcId, u8 flags, u8 steam64 length, u16 lastDeathAt length,
+#            u16 lastVoiceState length, then the three UTF-8 strings.
+# Optional fields are stored as 0 with their presence bit cleared in ``flags``.
+
+MAGIC = b"MMUS"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHI")
+_RECORD = struct.Struct("<qqqqqBBHH")
+
+_DEAD = 0x01
+_HAS_VALIDATED = 0x02
+_HAS_DEAD_UNTIL = 0x04
+_HAS_ALIVE_SEC = 0x08
+_HAS_LAST_DEATH = 0x10
+_HAS_PRIVATE_VC = 0x20
+_HAS_VOICE_STATE = 0x40
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def dump_users(users: Iterable[UserRecord]) -> bytes:
+    parts = []
+    count = 0
+    pack = _RECORD.pack
+    for user in users:
+        flags = _DEAD if user.isDead else 0
+        if user.validatedAtTs is not None:
+            flags |= _HAS_VALIDATED
+        if user.deadUntilTs is not None:
+            flags |= _HAS_DEAD_UNTIL
+        if user.lastAliveSec is not None:
+            flags |= _HAS_ALIVE_SEC
+        last_death = b""
+        if user.lastDeathAt is not None:
+            flags |= _HAS_LAST_DEATH
+            last_death = user.lastDeathAt.encode("utf-8")
+        if user.privateVcId is not None:
+            flags |= _HAS_PRIVATE_VC
+        voice = b""
+        if user.lastVoiceState is not None:
+            flags |= _HAS_VOICE_STATE
+            voice = user.lastVoiceState.encode("utf-8")
+        steam = user.steam64.encode("utf-8")
+        parts.append(
+            pack(
+                user.discordId,
+                user.validatedAtTs or 0,
+                user.deadUntilTs or 0,
+                user.lastAliveSec or 0,
+                user.privateVcId or 0,
+                flags,
+                len(steam),
+                len(last_death),
+                len(voice),
+            )
+        )
+        parts.append(steam)
+        parts.append(last_death)
+        parts.append(voice)
+        count += 1
+    return _HEADER.pack(MAGIC, VERSION, count) + b"".join(parts)
+
+
+def load_users(data: bytes) -> Dict[str, UserRecord]:
+    if len(data) < _HEADER.size:
+        raise SnapshotError("truncated snapshot header")
+    magic, version, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise SnapshotError(f"unsupported snapshot {magic!r} v{version}")
+    view = memoryview(data)
+    unpack = _RECORD.unpack_from
+    size = _RECORD.size
+    offset = _HEADER.size
+    users: Dict[str, UserRecord] = {}
+    try:
+        for _ in range(count):
+            discord_id, validated, dead_until, alive_sec, private_vc, flags, steam_len, death_len, voice_len = unpack(
+                data, offset
+            )
+            offset += size
+            steam64 = str(view[offset:offset + steam_len], "utf-8")
+            offset += steam_len
+            last_death = str(view[offset:offset + death_len], "utf-8") if flags & _HAS_LAST_DEATH else None
+            offset += death_len
+            voice = str(view[offset:offset + voice_len], "utf-8") if flags & _HAS_VOICE_STATE else None
+            offset += voice_len
+            users[steam64] = UserRecord(
+                steam64,
+                discord_id,
+                validated if flags & _HAS_VALIDATED else None,
+                bool(flags & _DEAD),
+                dead_until if flags & _HAS_DEAD_UNTIL else None,
+                alive_sec if flags & _HAS_ALIVE_SEC else None,
+                last_death,
+                private_vc if flags & _HAS_PRIVATE_VC else None,
+                voice,
+            )
+    except struct.error as exc:
+        raise SnapshotError("truncated snapshot record") from exc
+    if offset != len(data):
+        raise SnapshotError("trailing bytes after snapshot records")
+    return users
@@ -1,46 +1,242 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from pathlib import Path
-from typing import Set
+from typing import AbstractSet, Callable, Dict, Iterable, List, Optional, Set
 
-from adapters.file_manager import read_lines, write_lines
+from adapters.coalescing_writer import CoalescingWriter
+from adapters.file_manager import read_lines
+from services.rcon_delivery import RconBanDelivery
 
 logger = logging.getLogger(__name__)
 
 
 class BanlistService:
-    def __init__(self, ban_path: Path, whitelist_path: Path) -> None:
+    def __init__(
+        self,
+        ban_path: Path,
+        whitelist_path: Path,
+        write_window: float = 0.25,
+        rcon: Optional[RconBanDelivery] = None,
+    ) -> None:
         self.ban_path = ban_path
         self.whitelist_path = whitelist_path
         self.banned: Set[str] = set(read_lines(self.ban_path))
         self.whitelist: Set[str] = set(read_lines(self.whitelist_path))
+        # ban.txt stays the source of truth; RCon only makes changes take effect
+        # on the running server without waiting for it to re-read the file.
+        self.rcon = rcon
+        if rcon is not None:
+            # After each (re)connect the server's bans are brought in line with ours.
+            rcon.desired = lambda: self.banned
+        # Sorting and joining tens of thousands of IDs happens on the I/O pool.
+        self._ban_writer = CoalescingWriter(
+            ban_path, lambda: frozenset(self.banned), write_window, serialize=_render_lines
+        )
+        self._whitelist_writer = CoalescingWriter(
+            whitelist_path, lambda: frozenset(self.whitelist), write_window, serialize=_render_lines
+        )
         logger.info(
             "Ban/whitelist loaded",
             extra={"ban_count": len(self.banned), "whitelist_count": len(self.whitelist)},
         )
 
-    def _persist(self) -> None:
-        write_lines(self.ban_path, sorted(self.banned))
-        write_lines(self.whitelist_path, sorted(self.whitelist))
+    async def flush(self) -> None:
+        await self._ban_writer.flush()
+        await self._whitelist_writer.flush()
 
-    def add_to_whitelist_and_ban(self, steam64: str) -> None:
-        self.whitelist.add(steam64)
-        self.banned.add(steam64)
-        self._persist()
-        logger.info("User validated and banned until VC join", extra={"steam64": steam64})
+    async def wait_written(self) -> None:
+        """Wait until ban.txt holds every ban made so far."""
+        await self._ban_writer.wait_written()
+
+    def start(self) -> None:
+        if self.rcon is not None:
+            self.rcon.start()
+
+    async def close(self) -> None:
+        await self.flush()
+        if self.rcon is not None:
+            await self.rcon.stop()
 
-    def add_ban(self, steam64: str) -> None:
+    def _banned(self, steam64s: Iterable[str]) -> None:
+        if self.rcon is not None:
+            for steam64 in steam64s:
+                self.rcon.ban(steam64)
+
+    def _unbanned(self, steam64s: Iterable[str]) -> None:
+        if self.rcon is not None:
+            for steam64 in steam64s:
+                self.rcon.unban(steam64)
+
+    def kick(self, steam64: str, on_done: Optional[Callable[[], None]] = None) -> None:
+        """Kick the player off the running server now; a no-op without RCon."""
+        if self.rcon is not None:
+            self.rcon.kick(steam64, on_done=on_done)
+
+    def add_to_whitelist_and_ban(self, steam64: str) -> None:
+        if steam64 not in self.whitelist:
+            self.whitelist.add(steam64)
+            self._whitelist_writer.mark_dirty()
         if steam64 not in self.banned:
             self.banned.add(steam64)
-            self._persist()
-            logger.info("User banned", extra={"steam64": steam64})
+            self._ban_writer.mark_dirty()
+            self._banned((steam64,))
+        logger.info("User validated and banned until VC join", extra={"steam64": steam64})
+
+    def add_to_whitelist_and_ban_many(self, steam64s: Iterable[str]) -> int:
+        steam64s = set(steam64s)
+        new_whitelist = steam64s - self.whitelist
+        new_bans = steam64s - self.banned
+        if new_whitelist:
+            self.whitelist |= new_whitelist
+            self._whitelist_writer.mark_dirty()
+        if new_bans:
+            self.banned |= new_bans
+            self._ban_writer.mark_dirty()
+            self._banned(new_bans)
+        logger.info(
+            "Users validated in bulk and banned until VC join",
+            extra={"count": len(steam64s), "new_whitelist": len(new_whitelist), "new_bans": len(new_bans)},
+        )
+        return len(new_whitelist)
+
+    def add_ban(self, steam64: str, on_written: Optional[Callable[[], None]] = None) -> bool:
+        """Ban ``steam64``; ``on_written`` fires once ban.txt holds the ban.
+
+        Returns False, without calling ``on_written``, if the player was already banned.
+        """
+        if steam64 in self.banned:
+            return False
+        self.banned.add(steam64)
+        self._ban_writer.mark_dirty()
+        if on_written is not None:
+            self._ban_writer.call_after_write(on_written)
+        self._banned((steam64,))
+        logger.info("User banned", extra={"steam64": steam64})
+        return True
 
     def remove_ban(self, steam64: str) -> None:
         if steam64 in self.banned:
             self.banned.remove(steam64)
-            self._persist()
+            self._ban_writer.mark_dirty()
+            self._unbanned((steam64,))
             logger.info("User unbanned", extra={"steam64": steam64})
 
     def is_banned(self, steam64: str) -> bool:
         return steam64 in self.banned
+
+    def call_after_ban_write(self, callback: Callable[[], None]) -> None:
+        self._ban_writer.call_after_write(callback)
+
+    def apply_batch(self, ban: Iterable[str] = (), unban: Iterable[str] = (), whitelist: Iterable[str] = ()) -> Dict[str, int]:
+        """Apply set-level changes and return how many entries each one actually changed."""
+        to_ban = set(ban) - self.banned
+        to_unban = set(unban) & self.banned
+        to_whitelist = set(whitelist) - self.whitelist
+        if to_ban or to_unban:
+            self.banned = (self.banned | to_ban) - to_unban
+            self._ban_writer.mark_dirty()
+            self._banned(to_ban)
+            self._unbanned(to_unban)
+        if to_whitelist:
+            self.whitelist |= to_whitelist
+            self._whitelist_writer.mark_dirty()
+        if to_ban or to_unban or to_whitelist:
+            logger.info(
+                "Ban/whitelist batch applied",
+                extra={"banned": len(to_ban), "unbanned": len(to_unban), "whitelisted": len(to_whitelist)},
+            )
+        return {"banned": len(to_ban), "unbanned": len(to_unban), "whitelisted": len(to_whitelist)}
+
+
+class BanlistFanout:
+    """Applies every ban/whitelist change to each server's BanlistService."""
+
+    def __init__(self, services: List[BanlistService]) -> None:
+        self.services = services
+
+    @property
+    def banned(self) -> Set[str]:
+        return set().union(*(s.banned for s in self.services))
+
+    @property
+    def whitelist(self) -> Set[str]:
+        return set().union(*(s.whitelist for s in self.services))
+
+    async def flush(self) -> None:
+        for service in self.services:
+            await service.flush()
+
+    async def wait_written(self) -> None:
+        await asyncio.gather(*(service.wait_written() for service in self.services))
+
+    def start(self) -> None:
+        for service in self.services:
+            service.start()
+
+    async def close(self) -> None:
+        for service in self.services:
+            await service.close()
+
+    def kick(self, steam64: str, on_done: Optional[Callable[[], None]] = None) -> None:
+        # The player is on at most one server; report the first kick that lands.
+        done = [False]
+
+        def first_kick() -> None:
+            if not done[0]:
+                done[0] = True
+                on_done()
+
+        for service in self.services:
+            service.kick(steam64, on_done=first_kick if on_done is not None else None)
+
+    def add_to_whitelist_and_ban(self, steam64: str) -> None:
+        for service in self.services:
+            service.add_to_whitelist_and_ban(steam64)
+
+    def add_to_whitelist_and_ban_many(self, steam64s: Iterable[str]) -> int:
+        steam64s = list(steam64s)
+        return max((service.add_to_whitelist_and_ban_many(steam64s) for service in self.services), default=0)
+
+    def add_ban(self, steam64: str, on_written: Optional[Callable[[], None]] = None) -> bool:
+        # on_written fires once every ban.txt that gained the ban has been written.
+        changed = [service for service in self.services if service.add_ban(steam64)]
+        if changed and on_written is not None:
+            _after_all(changed, on_written)
+        return bool(changed)
+
+    def remove_ban(self, steam64: str) -> None:
+        for service in self.services:
+            service.remove_ban(steam64)
+
+    def is_banned(self, steam64: str) -> bool:
+        return any(service.is_banned(steam64) for service in self.services)
+
+    def call_after_ban_write(self, callback: Callable[[], None]) -> None:
+        # Fires once every server's ban.txt has been written.
+        _after_all(self.services, callback)
+
+    def apply_batch(self, ban: Iterable[str] = (), unban: Iterable[str] = (), whitelist: Iterable[str] = ()) -> Dict[str, int]:
+        ban, unban, whitelist = set(ban), set(unban), set(whitelist)
+        totals = {"banned": 0, "unbanned": 0, "whitelisted": 0}
+        for service in self.services:
+            for key, count in service.apply_batch(ban, unban, whitelist).items():
+                totals[key] += count
+        return totals
+
+
+def _after_all(services: List[BanlistService], callback: Callable[[], None]) -> None:
+    remaining = [len(services)]
+
+    def one_written() -> None:
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            callback()
+
+    for service in services:
+        service.call_after_ban_write(one_written)
+
+
+def _render_lines(entries: AbstractSet[str]) -> str:
+    return "\n".join(sorted(entries)) + "\n"
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import zlib
+from typing import Awaitable, Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# May return an awaitable that completes once the handler's writes are durable.
+DeathHandler = Callable[[dict], Awaitable[Optional[Awaitable[None]]]]
+# Awaited once the event is durably enforced; the flag tells whether it succeeded.
+DoneCallback = Callable[[bool], Awaitable[None]]
+
+
+class DeathEventPipeline:
+    """Bounded hand-off between the log tailer and death enforcement.
+
+    Events are sharded by steamId onto one queue per worker, so deaths of different
+    players are enforced concurrently while any one player's events stay strictly in
+    order. ``submit`` blocks once a shard is full, which throttles the tailer instead
+    of growing memory. ``on_done`` lets the submitter learn when an event has been
+    fully enforced, so it can move its durable cursor only past completed work.
+
+    When the handler returns an awaitable (its coalesced writes landing), the worker
+    moves on to the next event and ``on_done`` and ``join`` wait for that awaitable
+    instead, so deaths share file writes without being reported done early.
+    """
+
+    def __init__(self, handler: DeathHandler, workers: int = 4, max_pending: int = 256) -> None:
+        self.handler = handler
+        workers = max(1, workers)
+        per_shard = max(1, max_pending // workers)
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=per_shard) for _ in range(workers)]
+        self._tasks: List[asyncio.Task] = []
+        self._completions: Set[asyncio.Task] = set()
+
+    @property
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker(q)) for q in self._queues]
+
+    async def submit(self, payload: dict, on_done: Optional[DoneCallback] = None) -> None:
+        steam_id = str(payload.get("player", {}).get("steamId"))
+        shard = zlib.crc32(steam_id.encode()) % len(self._queues)
+        await self._queues[shard].put((payload, on_done))
+
+    async def join(self) -> None:
+        for queue in self._queues:
+            await queue.join()
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Death pipeline stopped with events pending", extra={"pending": self.depth})
+        # Anything still waiting on its writes is left unreported, so it is replayed.
+        for task in [*self._tasks, *self._completions]:
+            task.cancel()
+        self._tasks = []
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            payload, on_done = await queue.get()
+            try:
+                durable = await self.handler(payload)
+            except Exception:
+                logger.exception("Death enforcement failed", extra={"ts": payload.get("ts")})
+                await self._finish(queue, payload, on_done, False)
+                continue
+            if durable is None:
+                await self._finish(queue, payload, on_done, True)
+                continue
+            task = asyncio.ensure_future(self._finish_when_durable(queue, payload, on_done, durable))
+            self._completions.add(task)
+            task.add_done_callback(self._completions.discard)
+
+    async def _finish_when_durable(
+        self, queue: asyncio.Queue, payload: dict, on_done: Optional[DoneCallback], durable: Awaitable[None]
+    ) -> None:
+        ok = True
+        try:
+            await durable
+        except Exception:
+            ok = False
+            logger.exception("Death enforcement writes failed", extra={"ts": payload.get("ts")})
+        await self._finish(queue, payload, on_done, ok)
+
+    async def _finish(self, queue: asyncio.Queue, payload: dict, on_done: Optional[DoneCallback], ok: bool) -> None:
+        try:
+            if on_done is not None:
+                await on_done(ok)
+        except Exception:
+            logger.exception("Death completion callback failed", extra={"ts": payload.get("ts")})
+        finally:
+            queue.task_done()
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import bisect
+import fnmatch
+import heapq
+import json
+import logging
+import os
+import struct
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from adapters.file_manager import run_io
+from models.user import iso_to_epoch
+from watchers.log_discovery import LOG_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# Append-only death history. Layout (little endian):
+#   header:  magic "MMPD", u16 version
+#   record:  u64 steam64, i64 death time (epoch ms), u32 aliveSec
+# aliveSec is NO_ALIVE_SEC when the death line did not carry it. A record is only
+# ever appended, so a crash can at worst leave a partial record at the end, which is
+# cut off on the next load. An empty "<path>.backfilled" file next to it marks that
+# the backfill from existing logs ran to completion.
+
+MAGIC = b"MMPD"
+VERSION = 1
+NO_ALIVE_SEC = 0xFFFFFFFF
+WEEK_SECONDS = 7 * 86400
+
+_HEADER = struct.Struct("<4sH")
+_RECORD = struct.Struct("<QqI")
+
+DeathRecord = Tuple[int, int, int]
+
+DEATH_TAG = b"PLAYER_DEATH"
+
+BOARDS = ("longest", "median", "survived", "deaths")
+# Batches larger than this re-sort the boards once instead of ranking record by record.
+BULK_THRESHOLD = 32
+
+
+@dataclass(slots=True)
+class PlayerStats:
+    steam64: str
+    deaths: int = 0
+    longest_life: int = 0
+    total_alive: int = 0
+    first_death_ms: int = 0
+    last_death_ms: int = 0
+    # Running median: max-heap (negated) of the lower half, min-heap of the upper half.
+    _low: List[int] = field(default_factory=list, repr=False)
+    _high: List[int] = field(default_factory=list, repr=False)
+
+    def add(self, death_ms: int, alive_sec: int) -> None:
+        self.deaths += 1
+        if not self.first_death_ms or death_ms < self.first_death_ms:
+            self.first_death_ms = death_ms
+        if death_ms > self.last_death_ms:
+            self.last_death_ms = death_ms
+        if alive_sec == NO_ALIVE_SEC:
+            return
+        self.total_alive += alive_sec
+        if alive_sec > self.longest_life:
+            self.longest_life = alive_sec
+        if self._low and alive_sec > -self._low[0]:
+            heapq.heappush(self._high, alive_sec)
+        else:
+            heapq.heappush(self._low, -alive_sec)
+        if len(self._low) > len(self._high) + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+        elif len(self._high) > len(self._low):
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+
+    @property
+    def median_life(self) -> float:
+        if not self._low:
+            return 0.0
+        if len(self._low) > len(self._high):
+            return float(-self._low[0])
+        return (-self._low[0] + self._high[0]) / 2
+
+    def deaths_per_week(self, now: Optional[float] = None) -> float:
+        if not self.deaths:
+            return 0.0
+        now = time.time() if now is None else now
+        weeks = max(1.0, (now - self.first_death_ms / 1000) / WEEK_SECONDS)
+        return self.deaths / weeks
+
+    def board_value(self, board: str) -> float:
+        if board == "longest":
+            return self.longest_life
+        if board == "median":
+            return self.median_life
+        if board == "survived":
+            return self.total_alive
+        return self.deaths
+
+
+def death_record(payload: dict) -> Optional[DeathRecord]:
+    player = payload.get("player") or {}
+    try:
+        steam64 = int(player.get("steamId"))
+    except (TypeError, ValueError):
+        return None
+    epoch = iso_to_epoch(payload.get("ts"))
+    if epoch is None:
+        return None
+    alive = player.get("aliveSec")
+    try:
+        alive_sec = min(max(int(alive), 0), NO_ALIVE_SEC - 1) if alive is not None else NO_ALIVE_SEC
+    except (TypeError, ValueError):
+        alive_sec = NO_ALIVE_SEC
+    return steam64, int(epoch * 1000), alive_sec
+
+
+def scan_log_deaths(path: Path) -> List[DeathRecord]:
+    """Stream one LJSON file and return its deaths; only death lines are decoded."""
+    records: List[DeathRecord] = []
+    with path.open("rb") as f:
+        for line in f:
+            if DEATH_TAG not in line:
+                continue
+            try:
+                payload = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(payload, dict) and payload.get("event") == "PLAYER_DEATH":
+                record = death_record(payload)
+                if record is not None:
+                    records.append(record)
+    return records
+
+
+def _touch(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+
+
+def _append(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as f:
+        if f.tell() == 0:
+            f.write(_HEADER.pack(MAGIC, VERSION))
+        f.write(data)
+
+
+class PlayerStatsStore:
+    """Per-player death history with incrementally maintained aggregates.
+
+    Every death is appended to ``path`` as a fixed-size record and folded into the
+    player's aggregates; a sorted board per metric is kept up to date on the same
+    call, so stats and leaderboard queries never scan the history. A death already
+    recorded (same steam64 and timestamp) is ignored, which makes replays and the
+    backfill safe to overlap with live tailing. While the backfill runs the boards
+    are not maintained; they are rebuilt once it finishes.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.players: Dict[str, PlayerStats] = {}
+        self._seen: Set[Tuple[int, int]] = set()
+        # Per board: ascending list of (-value, steam64), so the head is the leader.
+        self._boards: Dict[str, List[Tuple[float, str]]] = {board: [] for board in BOARDS}
+        self.backfill_marker = path.with_name(path.name + ".backfilled")
+        # An interrupted backfill leaves no marker and simply runs again; replayed
+        # deaths are deduplicated.
+        self.needs_backfill = not self.backfill_marker.exists()
+        self._backfilling = False
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = self.path.read_bytes()
+        except OSError:
+            logger.warning("Failed to read player stats", extra={"path": str(self.path)})
+            return
+        if len(data) < _HEADER.size or _HEADER.unpack_from(data, 0) != (MAGIC, VERSION):
+            logger.warning("Unsupported player stats file, ignoring it", extra={"path": str(self.path)})
+            return
+        body = len(data) - _HEADER.size
+        whole = body - body % _RECORD.size
+        if whole != body:
+            # A crash mid-append; drop the partial record so later appends stay aligned.
+            logger.warning("Truncating partial player stats record", extra={"bytes": body - whole})
+            with self.path.open("r+b") as f:
+                f.truncate(_HEADER.size + whole)
+        for steam64, death_ms, alive_sec in _RECORD.iter_unpack(memoryview(data)[_HEADER.size:_HEADER.size + whole]):
+            self._apply(steam64, death_ms, alive_sec, rank=False)
+        self._rebuild_boards()
+        logger.info("Player stats loaded", extra={"deaths": len(self._seen), "players": len(self.players)})
+
+    def _apply(self, steam64: int, death_ms: int, alive_sec: int, rank: bool = True) -> bool:
+        key = (steam64, death_ms)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        steam = str(steam64)
+        stats = self.players.get(steam)
+        if stats is None:
+            stats = self.players[steam] = PlayerStats(steam)
+        elif rank:
+            self._unrank(stats)
+        stats.add(death_ms, alive_sec)
+        if rank:
+            self._rank(stats)
+        return True
+
+    def _rebuild_boards(self) -> None:
+        # Bulk loads skip per-record ranking; one sort per board is far cheaper.
+        for board in BOARDS:
+            self._boards[board] = sorted((-stats.board_value(board), stats.steam64) for stats in self.players.values())
+
+    def _rank(self, stats: PlayerStats) -> None:
+        for board, entries in self._boards.items():
+            bisect.insort(entries, (-stats.board_value(board), stats.steam64))
+
+    def _unrank(self, stats: PlayerStats) -> None:
+        for board, entries in self._boards.items():
+            i = bisect.bisect_left(entries, (-stats.board_value(board), stats.steam64))
+            del entries[i]
+
+    async def record_event(self, payload: dict) -> None:
+        record = death_record(payload)
+        if record is not None:
+            await self.record_many([record])
+
+    async def record_many(self, records: Iterable[DeathRecord]) -> int:
+        records = list(records)
+        if self._backfilling:
+            new = [r for r in records if self._apply(*r, rank=False)]
+        elif len(records) <= BULK_THRESHOLD:
+            new = [r for r in records if self._apply(*r)]
+        else:
+            new = [r for r in records if self._apply(*r, rank=False)]
+            self._rebuild_boards()
+        if new:
+            data = b"".join(_RECORD.pack(*r) for r in new)
+            await run_io(self.path, _append, self.path, data)
+        return len(new)
+
+    async def backfill(self, logs_dirs: Iterable[Path]) -> int:
+        """Stream every existing log file once and record the deaths not seen yet."""
+        added = 0
+        started = time.monotonic()
+        self._backfilling = True
+        try:
+            for logs_dir in logs_dirs:
+                try:
+                    names = sorted(e.name for e in os.scandir(logs_dir) if fnmatch.fnmatch(e.name, LOG_PATTERN))
+                except OSError:
+                    continue
+                for name in names:
+                    path = logs_dir / name
+                    try:
+                        records = await run_io(path, scan_log_deaths, path)
+                    except OSError:
+                        logger.warning("Failed to scan log for stats backfill", extra={"path": str(path)})
+                        continue
+                    added += await self.record_many(records)
+        finally:
+            self._backfilling = False
+            self._rebuild_boards()
+        # Appends to the history are serialized on its path, so once this lands every
+        # backfilled record is on disk before the marker.
+        await run_io(self.path, _touch, self.backfill_marker)
+        self.needs_backfill = False
+        logger.info(
+            "Player stats backfill complete",
+            extra={"deaths": added, "seconds": round(time.monotonic() - started, 2)},
+        )
+        return added
+
+    def get(self, steam64: str) -> Optional[PlayerStats]:
+        return self.players.get(str(steam64))
+
+    def leaderboard(self, board: str = "longest", limit: int = 10) -> List[Tuple[str, float]]:
+        if board not in self._boards:
+            raise ValueError(f"Unknown leaderboard {board!r}; pick one of {', '.join(BOARDS)}")
+        return [(steam64, -value) for value, steam64 in self._boards[board][:limit]]
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import AbstractSet, Callable, Dict, List, Optional, Set, Tuple
+
+from adapters.battleye_rcon import BattlEyeRconClient, RconAuthError, RconError, be_guid
+from metrics import RCON_COMMAND
+
+logger = logging.getLogger(__name__)
+
+BAN_REASON = "MementoMori"
+KICK_REASON = "MementoMori: you are dead"
+# A kick that could not be sent within this long is moot: the file ban covers it.
+KICK_TTL_SECONDS = 60.0
+RECONNECT_MIN_SECONDS = 1.0
+RECONNECT_MAX_SECONDS = 60.0
+
+# "players": "0   1.2.3.4:2304   47   <guid>(OK) Name"; ping is -1 while connecting.
+_PLAYER_LINE = re.compile(r"^(\d+)\s+\S+\s+-?\d+\s+([0-9a-f]{32})\(\S*\)\s+(.*)$")
+# "bans", GUID section: "3  <guid>  perm  reason"
+_BAN_LINE = re.compile(r"^(\d+)\s+([0-9a-f]{32})\s+(\S+)\s*(.*)$")
+
+
+def parse_players(text: str) -> Dict[str, int]:
+    """GUID -> player number from a ``players`` reply."""
+    players: Dict[str, int] = {}
+    for line in text.splitlines():
+        match = _PLAYER_LINE.match(line.strip())
+        if match:
+            players[match.group(2)] = int(match.group(1))
+    return players
+
+
+def parse_bans(text: str) -> List[Tuple[int, str, str]]:
+    """(ban number, GUID, reason) for every GUID ban in a ``bans`` reply."""
+    bans: List[Tuple[int, str, str]] = []
+    for line in text.splitlines():
+        match = _BAN_LINE.match(line.strip())
+        if match:
+            bans.append((int(match.group(1)), match.group(2), match.group(4)))
+    return bans
+
+
+class RconBanDelivery:
+    """Pushes ban, unban and kick requests to one DayZ server over BattlEye RCon.
+
+    Requests are coalesced per steam64 (the latest ban/unban wins) and sent in
+    batches once ``batch_window`` has passed: one ``players`` lookup for all kicks,
+    one ``bans`` lookup for all unbans and a single ``writeBans`` at the end. The
+    session is kept open and re-established with backoff; bans and unbans that
+    could not be delivered stay queued, kicks expire after ``KICK_TTL_SECONDS``.
+    ban.txt remains the durable record, this only makes the change take effect now.
+
+    Bans are sent as permanent and queued unbans only live in memory, so after every
+    (re)connect the server's ``bans`` list is compared with ``desired`` (the ban
+    list the owner holds): our bans missing on the server are queued and ours that
+    are no longer wanted are removed, so a crash or failed unban cannot leave a
+    player banned for good.
+    """
+
+    def __init__(self, client: BattlEyeRconClient, batch_window: float = 0.05, name: str = "default") -> None:
+        self.client = client
+        self.batch_window = batch_window
+        self.name = name
+        self._bans: "OrderedDict[str, bool]" = OrderedDict()
+        # GUIDs we banned on the server that ``desired`` no longer holds.
+        self._stale_guids: Set[str] = set()
+        # Set by the owning BanlistService; without it there is nothing to converge on.
+        self.desired: Optional[Callable[[], AbstractSet[str]]] = None
+        self._synced = False
+        self._kicks: "OrderedDict[str, Tuple[float, str, List[Callable[[], None]]]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._backoff = RECONNECT_MIN_SECONDS
+        # Set once the server's ban list changed and it has not been told to save it.
+        self._unsaved = False
+        self.bans_sent = 0
+        self.unbans_sent = 0
+        self.kicks_sent = 0
+        self.kicks_expired = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._bans) + len(self._kicks) + len(self._stale_guids)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connected": int(self.client.connected),
+            "queue_depth": self.queue_depth,
+            "bans_sent": self.bans_sent,
+            "unbans_sent": self.unbans_sent,
+            "kicks_sent": self.kicks_sent,
+            "kicks_expired": self.kicks_expired,
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.client.connected and (self.queue_depth or self._unsaved):
+            try:
+                await self._deliver()
+            except RconError:
+                logger.warning("RCon changes left undelivered at shutdown", extra={"server": self.name})
+        await self.client.close()
+
+    def ban(self, steam64: str) -> None:
+        if self._stale_guids:
+            self._stale_guids.discard(be_guid(steam64))
+        self._bans[steam64] = True
+        self._bans.move_to_end(steam64)
+        self._wake()
+
+    def unban(self, steam64: str) -> None:
+        self._bans[steam64] = False
+        self._bans.move_to_end(steam64)
+        self._kicks.pop(steam64, None)
+        self._wake()
+
+    def kick(self, steam64: str, reason: str = KICK_REASON, on_done: Optional[Callable[[], None]] = None) -> None:
+        _, _, callbacks = self._kicks.get(steam64, (0.0, reason, []))
+        if on_done is not None:
+            callbacks.append(on_done)
+        self._kicks[steam64] = (time.monotonic(), reason, callbacks)
+        self._wake()
+
+    def _wake(self) -> None:
+        # Without a running loop (startup, tests) requests just wait for start().
+        if self._task is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            if self._synced and not self.queue_depth and not self._unsaved:
+                await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(self.batch_window)
+            try:
+                if not self.client.connected:
+                    self._synced = False
+                    await self._connect()
+                if not self._synced:
+                    await self._reconcile()
+                    self._synced = True
+                await self._deliver()
+                self._backoff = RECONNECT_MIN_SECONDS
+            except RconAuthError:
+                logger.error("RCon login rejected; check rcon_password", extra={"server": self.name})
+                await self._sleep_backoff()
+            except (RconError, OSError) as exc:
+                logger.warning("RCon delivery failed", extra={"server": self.name, "error": str(exc)})
+                if not self.client.connected:
+                    await self.client.close()
+                    await self._sleep_backoff()
+                # Otherwise a single reply was lost; the next pass retries what is left.
+
+    async def _connect(self) -> None:
+        with RCON_COMMAND.time(self.name, "login"):
+            await self.client.connect()
+
+    async def _reconcile(self) -> None:
+        if self.desired is None:
+            return
+        listed = parse_bans(await self._command("bans", "bans"))
+        ours = {guid for _, guid, reason in listed if reason.startswith(BAN_REASON)}
+        wanted = {be_guid(steam64): steam64 for steam64 in self.desired()}
+        missing = [s for guid, s in wanted.items() if guid not in ours and s not in self._bans]
+        for steam64 in missing:
+            self._bans[steam64] = True
+        self._stale_guids = ours - wanted.keys()
+        if missing or self._stale_guids:
+            logger.info(
+                "Reconciling server bans with ban list",
+                extra={"server": self.name, "missing": len(missing), "stale": len(self._stale_guids)},
+            )
+
+    async def _sleep_backoff(self) -> None:
+        await asyncio.sleep(self._backoff)
+        self._backoff = min(self._backoff * 2, RECONNECT_MAX_SECONDS)
+
+    async def _command(self, verb: str, text: str, retry: bool = True) -> str:
+        with RCON_COMMAND.time(self.name, verb):
+            return await self.client.command(text, retry)
+
+    async def _deliver(self) -> None:
+        # Kicks first: they are what stops a dead player right now.
+        await self._deliver_kicks()
+        bans = [s for s, banned in self._bans.items() if banned]
+        unbans = [s for s, banned in self._bans.items() if not banned]
+        if not bans and not unbans and not self._stale_guids and not self._unsaved:
+            return
+        # addBan is independent per GUID, so the batch is sent concurrently; the client
+        # caps how many are in flight. Each ban leaves the queue as soon as it is
+        # confirmed, so a partial failure only retries the ones that were not.
+        results = await asyncio.gather(*(self._add_ban(s) for s in bans), return_exceptions=True)
+        failed = sum(isinstance(result, Exception) for result in results)
+        if failed:
+            raise RconError(f"{failed} addBan(s) unconfirmed")
+        if unbans or self._stale_guids:
+            await self._deliver_unbans(unbans)
+        await self._command("writeBans", "writeBans")
+        self._unsaved = False
+
+    async def _add_ban(self, steam64: str) -> None:
+        await self._command("addBan", f"addBan {be_guid(steam64)} 0 {BAN_REASON}")
+        self._unsaved = True
+        if self._bans.get(steam64) is True:
+            del self._bans[steam64]
+        self.bans_sent += 1
+
+    async def _deliver_kicks(self) -> None:
+        if not self._kicks:
+            return
+        now = time.monotonic()
+        for steam64 in [s for s, (queued, _, _) in self._kicks.items() if now - queued > KICK_TTL_SECONDS]:
+            del self._kicks[steam64]
+            self.kicks_expired += 1
+        if not self._kicks:
+            return
+        kicks = dict(self._kicks)
+        online = parse_players(await self._command("players", "players"))
+        targets = [(s, online[be_guid(s)], kicks[s][1]) for s in kicks if be_guid(s) in online]
+        results = await asyncio.gather(
+            *(self._command("kick", f"kick {number} {reason}", retry=False) for _, number, reason in targets),
+            return_exceptions=True,
+        )
+        failed = {steam64 for (steam64, _, _), result in zip(targets, results) if isinstance(result, Exception)}
+        for steam64, entry in kicks.items():
+            # Not online means nothing left to kick; failed kicks and kicks
+            # re-requested meanwhile stay queued.
+            if steam64 not in failed and self._kicks.get(steam64) is entry:
+                del self._kicks[steam64]
+        for steam64, _, _ in targets:
+            if steam64 not in failed:
+                self.kicks_sent += 1
+                for callback in kicks[steam64][2]:
+                    callback()
+        if failed:
+            raise RconError(f"{len(failed)} kick(s) unconfirmed")
+
+    async def _deliver_unbans(self, unbans: List[str]) -> None:
+        stale = set(self._stale_guids)
+        guids = {be_guid(s) for s in unbans} | stale
+        listed = parse_bans(await self._command("bans", "bans"))
+        numbers = sorted((n for n, guid, reason in listed if guid in guids and reason.startswith(BAN_REASON)), reverse=True)
+        # Ban numbers shift down on every removal, so remove from the highest one and
+        # wait for each reply before sending the next. A lost reply fails the batch and
+        # the next attempt starts from a fresh ``bans`` listing.
+        for number in numbers:
+            await self._command("removeBan", f"removeBan {number}", retry=False)
+            self._unsaved = True
+        for steam64 in unbans:
+            if self._bans.get(steam64) is False:
+                del self._bans[steam64]
+        self._stale_guids -= stale
+        self.unbans_sent += len(unbans) + len(stale)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class ReviveScheduler:
+    """Min-heap of pending deadUntil deadlines (epoch seconds) keyed by steam64.
+
+    Rescheduling and cancelling are lazy: the live deadline for a player lives in
+    ``_deadlines`` and heap entries that no longer match it are discarded when popped.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, steam64: str) -> bool:
+        return steam64 in self._deadlines
+
+    def schedule(self, steam64: str, deadline: float) -> None:
+        self._deadlines[steam64] = deadline
+        heapq.heappush(self._heap, (deadline, steam64))
+        self._compact_if_needed()
+        self._changed.set()
+
+    def cancel(self, steam64: str) -> None:
+        if self._deadlines.pop(steam64, None) is not None:
+            self._compact_if_needed()
+            self._changed.set()
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._deadlines.clear()
+        self._changed.set()
+
+    def next_deadline(self) -> Optional[float]:
+        while self._heap:
+            deadline, steam64 = self._heap[0]
+            if self._deadlines.get(steam64) == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float) -> List[str]:
+        due: List[str] = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return due
+            _, steam64 = heapq.heappop(self._heap)
+            del self._deadlines[steam64]
+            due.append(steam64)
+
+    async def wait_due(self) -> List[str]:
+        while True:
+            deadline = self.next_deadline()
+            now = time.time()
+            if deadline is not None and deadline <= now:
+                return self.pop_due(now)
+            self._changed.clear()
+            timeout = None if deadline is None else deadline - now
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _compact_if_needed(self) -> None:
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [(d, s) for s, d in self._deadlines.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+from adapters.file_manager import read_json
+from models.user import UserRecord
+from services.revive_scheduler import ReviveScheduler
+from services.user_service import UserService, parse_users
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_COLUMNS = (
+    "steam64",
+    "discordId",
+    "validatedAt",
+    "isDead",
+    "deadUntil",
+    "lastAliveSec",
+    "lastDeathAt",
+    "privateVcId",
+    "lastVoiceState",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    steam64 TEXT PRIMARY KEY,
+    discordId INTEGER NOT NULL,
+    validatedAt TEXT,
+    isDead INTEGER NOT NULL DEFAULT 0,
+    deadUntil TEXT,
+    lastAliveSec INTEGER,
+    lastDeathAt TEXT,
+    privateVcId INTEGER,
+    lastVoiceState TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_discord ON users (discordId);
+CREATE INDEX IF NOT EXISTS idx_users_private_vc ON users (privateVcId);
+CREATE INDEX IF NOT EXISTS idx_users_dead ON users (isDead, deadUntil);
+"""
+
+_UPSERT = "INSERT INTO users ({cols}) VALUES ({marks}) ON CONFLICT(steam64) DO UPDATE SET {updates}".format(
+    cols=", ".join(_COLUMNS),
+    marks=", ".join("?" for _ in _COLUMNS),
+    updates=", ".join(f"{c} = excluded.{c}" for c in _COLUMNS[1:]),
+)
+
+
+class SqliteUserService(UserService):
+    """UserService backed by a WAL-mode SQLite database.
+
+    ``users`` is an identity map of the rows loaded so far rather than the whole
+    table; misses go to the indexed columns. Mutations mark rows dirty and ``save``
+    upserts only those rows in one transaction.
+    """
+
+    def __init__(self, path: Path, migrate_from: Optional[Path] = None) -> None:
+        self.path = path
+        self.users: Dict[str, UserRecord] = {}
+        self._by_discord: Dict[int, UserRecord] = {}
+        self._by_private_vc: Dict[int, UserRecord] = {}
+        self._dirty: Set[str] = set()
+        self.revive_schedule = ReviveScheduler()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self._migrate(migrate_from)
+        self._rebuild_revive_schedule()
+        count = self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        logger.info("User DB loaded", extra={"count": count, "backend": "sqlite"})
+
+    def _migrate(self, json_path: Optional[Path]) -> None:
+        payload = read_json(json_path, {}) if json_path else {}
+        with self._conn:
+            self._conn.executemany(_UPSERT, (_row(user) for user in parse_users(payload).values()))
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if payload:
+            logger.info("Migrated JSON user DB to SQLite", extra={"count": len(payload), "source": str(json_path)})
+
+    def _cache(self, row: Optional[sqlite3.Row]) -> Optional[UserRecord]:
+        if row is None:
+            return None
+        cached = self.users.get(row["steam64"])
+        if cached is not None:
+            return cached
+        user = UserRecord.from_dict(dict(row))
+        self.users[user.steam64] = user
+        self._by_discord[user.discordId] = user
+        if user.privateVcId:
+            self._by_private_vc[user.privateVcId] = user
+        return user
+
+    def _rebuild_revive_schedule(self) -> None:
+        self.revive_schedule.clear()
+        rows = self._conn.execute(
+            "SELECT * FROM users WHERE isDead = 1 AND deadUntil IS NOT NULL ORDER BY deadUntil"
+        )
+        self.users = {}
+        for row in rows:
+            self._cache(row)
+        super()._rebuild_revive_schedule()
+
+    def get(self, steam64: str) -> Optional[UserRecord]:
+        user = self.users.get(steam64)
+        if user is not None:
+            return user
+        return self._cache(self._conn.execute("SELECT * FROM users WHERE steam64 = ?", (steam64,)).fetchone())
+
+    def get_by_discord(self, discord_id: int) -> Optional[UserRecord]:
+        user = self._by_discord.get(discord_id)
+        if user is not None:
+            return user
+        return self._cache(self._conn.execute("SELECT * FROM users WHERE discordId = ?", (discord_id,)).fetchone())
+
+    def iter_users(self) -> Iterator[UserRecord]:
+        # Full scans (reconciliation) must not pull the whole table into the identity map.
+        self.save()
+        for row in self._conn.execute("SELECT * FROM users").fetchall():
+            cached = self.users.get(row["steam64"])
+            yield cached if cached is not None else UserRecord.from_dict(dict(row))
+
+    def get_by_private_vc(self, channel_id: int) -> Optional[UserRecord]:
+        user = self._by_private_vc.get(channel_id)
+        if user is not None:
+            return user
+        return self._cache(self._conn.execute("SELECT * FROM users WHERE privateVcId = ?", (channel_id,)).fetchone())
+
+    def _changed(self, user: UserRecord) -> None:
+        self._dirty.add(user.steam64)
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        rows = [_row(self.users[steam64]) for steam64 in self._dirty if steam64 in self.users]
+        with self._conn:
+            self._conn.executemany(_UPSERT, rows)
+        self._dirty.clear()
+        logger.debug("User DB saved", extra={"rows": len(rows), "backend": "sqlite"})
+
+    async def flush(self) -> None:
+        self.save()
+
+    async def wait_written(self) -> None:
+        # Rows are committed by save(); there is no deferred write to wait for.
+        self.save()
+
+    async def close(self) -> None:
+        self.save()
+        self._conn.close()
+
+
+def _row(user: UserRecord) -> tuple:
+    data = user.to_dict()
+    data["isDead"] = int(bool(data["isDead"]))
+    return tuple(data[c] for c in _COLUMNS)
@@ -1,62 +1,189 @@
 from __future__ import annotations
 
+import json
 import logging
-from datetime import datetime, timedelta, timezone
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from adapters.file_manager import read_json, write_json
+from adapters.coalescing_writer import CoalescingWriter
+from adapters.file_manager import atomic_write_bytes_async, read_json
 from models.user import UserRecord
+from models.user_snapshot import SnapshotError, dump_users, load_users
+from services.revive_scheduler import ReviveScheduler
 
 logger = logging.getLogger(__name__)
 
 
 class UserService:
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, write_window: float = 0.25, snapshot_path: Optional[Path] = None) -> None:
         self.path = path
+        self.snapshot_path = snapshot_path
+        self._writer = CoalescingWriter(path, self._render, write_window, serialize=_serialize_users)
         self.users: Dict[str, UserRecord] = {}
+        self._by_discord: Dict[int, UserRecord] = {}
+        self._by_private_vc: Dict[int, UserRecord] = {}
+        self.revive_schedule = ReviveScheduler()
         self._load()
 
     def _load(self) -> None:
-        payload = read_json(self.path, {})
-        self.users = {k: UserRecord.from_dict(v) for k, v in payload.items()}
+        if not self._load_snapshot():
+            self.users = parse_users(read_json(self.path, {}))
+        self._rebuild_indexes()
+        self._rebuild_revive_schedule()
         logger.info("User DB loaded", extra={"count": len(self.users)})
 
-    def save(self) -> None:
-        write_json(self.path, {k: v.to_dict() for k, v in self.users.items()})
+    def _load_snapshot(self) -> bool:
+        # The snapshot is written on clean shutdown after the final JSON flush, so it is
+        # only trusted while it is at least as new as users.json.
+        if not self.snapshot_path or not self.snapshot_path.exists():
+            return False
+        if self.path.exists() and self.path.stat().st_mtime_ns > self.snapshot_path.stat().st_mtime_ns:
+            return False
+        try:
+            self.users = load_users(self.snapshot_path.read_bytes())
+        except (OSError, SnapshotError):
+            logger.warning("Ignoring unreadable user snapshot", extra={"path": str(self.snapshot_path)})
+            return False
+        return True
+
+    async def write_snapshot(self) -> None:
+        if self.snapshot_path:
+            await atomic_write_bytes_async(self.snapshot_path, dump_users(self.users.values()))
+
+    def _render(self) -> Dict[str, dict]:
+        # Only the cheap per-record copy happens on the loop; json.dumps of the whole
+        # DB runs on the I/O pool.
         logger.debug("User DB saved", extra={"count": len(self.users)})
+        return {k: v.to_dict() for k, v in self.users.items()}
 
-    def get_by_discord(self, discord_id: int) -> Optional[UserRecord]:
+    def save(self) -> None:
+        self._writer.mark_dirty()
+
+    async def flush(self) -> None:
+        await self._writer.flush()
+
+    async def wait_written(self) -> None:
+        # Barrier that rides on the next coalesced write instead of forcing one.
+        await self._writer.wait_written()
+
+    async def close(self) -> None:
+        await self.flush()
+        await self.write_snapshot()
+
+    def _changed(self, user: UserRecord) -> None:
+        # Hook for backends that persist per row; the JSON file is always rewritten whole.
+        pass
+
+    def _rebuild_indexes(self) -> None:
+        self._by_discord = {}
+        self._by_private_vc = {}
         for user in self.users.values():
-            if user.discordId == discord_id:
-                return user
-        return None
+            self._by_discord[user.discordId] = user
+            if user.privateVcId:
+                self._by_private_vc[user.privateVcId] = user
+
+    def _rebuild_revive_schedule(self) -> None:
+        self.revive_schedule.clear()
+        for user in self.users.values():
+            if user.isDead and user.deadUntilTs is not None:
+                self.revive_schedule.schedule(user.steam64, user.deadUntilTs)
+
+    def get(self, steam64: str) -> Optional[UserRecord]:
+        return self.users.get(steam64)
+
+    def get_by_discord(self, discord_id: int) -> Optional[UserRecord]:
+        return self._by_discord.get(discord_id)
+
+    def iter_users(self) -> Iterator[UserRecord]:
+        return iter(list(self.users.values()))
+
+    def get_by_private_vc(self, channel_id: int) -> Optional[UserRecord]:
+        return self._by_private_vc.get(channel_id)
 
     def ensure_user(self, steam64: str, discord_id: int) -> UserRecord:
-        if steam64 not in self.users:
-            self.users[steam64] = UserRecord(steam64=steam64, discordId=discord_id)
-        return self.users[steam64]
+        user = self.get(steam64)
+        if user is None:
+            user = UserRecord(steam64=steam64, discordId=discord_id)
+            self.users[steam64] = user
+            self._by_discord[discord_id] = user
+            self._changed(user)
+        return user
+
+    def _rebind_discord(self, user: UserRecord, discord_id: int) -> None:
+        if user.discordId == discord_id:
+            return
+        if self._by_discord.get(user.discordId) is user:
+            del self._by_discord[user.discordId]
+        user.discordId = discord_id
+        self._by_discord[discord_id] = user
+        self._changed(user)
 
     def mark_validated(self, steam64: str, discord_id: int) -> UserRecord:
         user = self.ensure_user(steam64, discord_id)
-        user.validatedAt = datetime.now(timezone.utc).isoformat()
+        # Re-validating a steam64 against another member moves the record over to them.
+        self._rebind_discord(user, discord_id)
+        user.validatedAtTs = int(time.time())
+        self._changed(user)
         return user
 
+    def mark_validated_many(self, pairs: Iterable[Tuple[int, str]]) -> List[UserRecord]:
+        return [self.mark_validated(steam64, discord_id) for discord_id, steam64 in pairs]
+
     def mark_death(self, steam64: str, death_ts: str, alive_sec: Optional[int], ban_duration_days: int) -> Optional[UserRecord]:
-        user = self.users.get(steam64)
+        user = self.get(steam64)
         if not user:
             logger.warning("Death event for unknown user", extra={"steam64": steam64})
             return None
+        dead_until = int(time.time()) + ban_duration_days * 86400
         user.isDead = True
-        user.deadUntil = (datetime.now(timezone.utc) + timedelta(days=ban_duration_days)).isoformat()
+        user.deadUntilTs = dead_until
         user.lastDeathAt = death_ts
-        user.lastAliveSec = alive_sec
+        user.lastAliveSec = _as_int(alive_sec)
+        self.revive_schedule.schedule(steam64, dead_until)
+        self._changed(user)
         return user
 
     def mark_revive(self, steam64: str) -> Optional[UserRecord]:
-        user = self.users.get(steam64)
+        user = self.get(steam64)
         if not user:
             return None
         user.isDead = False
-        user.deadUntil = None
+        user.deadUntilTs = None
+        self.revive_schedule.cancel(steam64)
+        self._changed(user)
         return user
+
+    def assign_private_vc(self, user: UserRecord, channel_id: int) -> None:
+        self.clear_private_vc(user)
+        user.privateVcId = channel_id
+        self._by_private_vc[channel_id] = user
+        self._changed(user)
+
+    def clear_private_vc(self, user: UserRecord) -> None:
+        if user.privateVcId and self._by_private_vc.get(user.privateVcId) is user:
+            del self._by_private_vc[user.privateVcId]
+        user.privateVcId = None
+        self._changed(user)
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _serialize_users(snapshot: Dict[str, dict]) -> str:
+    return json.dumps(snapshot, indent=2)
+
+
+def parse_users(payload: dict) -> Dict[str, UserRecord]:
+    # A single hand-edited or corrupt row must not keep the whole DB from loading.
+    users: Dict[str, UserRecord] = {}
+    for key, value in payload.items():
+        try:
+            users[key] = UserRecord.from_dict(value)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logger.warning("Skipping unreadable user record", extra={"steam64": key})
+    return users
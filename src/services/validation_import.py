@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Tuple
+
+_SEPARATORS = re.compile(r"[,;\t ]+")
+_STEAM64 = re.compile(r"^\d{17}$")
+
+
+def parse_validation_rows(text: str) -> Tuple[List[Tuple[int, str]], List[str]]:
+    """Parse ``discord_id,steam64`` rows from a CSV/text upload.
+
+    Blank lines, ``#`` comments and a non-numeric header row are ignored. Returns the
+    accepted pairs in file order and one error string per rejected line. A steam64 or
+    Discord ID that appears twice is rejected on its second occurrence.
+    """
+    pairs: List[Tuple[int, str]] = []
+    errors: List[str] = []
+    seen_steam: Dict[str, int] = {}
+    seen_discord: Dict[int, int] = {}
+    for number, raw in enumerate(text.splitlines(), start=1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [f.strip().strip('"') for f in _SEPARATORS.split(line) if f.strip()]
+        if number == 1 and fields and not fields[0].lstrip("<@!").rstrip(">").isdigit():
+            continue
+        if len(fields) != 2:
+            errors.append(f"line {number}: expected discord_id,steam64")
+            continue
+        discord_raw, steam64 = fields
+        discord_raw = discord_raw.lstrip("<@!").rstrip(">")
+        if not discord_raw.isdigit():
+            errors.append(f"line {number}: invalid Discord ID {discord_raw!r}")
+            continue
+        if not _STEAM64.match(steam64):
+            errors.append(f"line {number}: invalid steam64 {steam64!r}")
+            continue
+        discord_id = int(discord_raw)
+        if steam64 in seen_steam:
+            errors.append(f"line {number}: steam64 {steam64} already on line {seen_steam[steam64]}")
+            continue
+        if discord_id in seen_discord:
+            errors.append(f"line {number}: Discord ID {discord_id} already on line {seen_discord[discord_id]}")
+            continue
+        seen_steam[steam64] = number
+        seen_discord[discord_id] = number
+        pairs.append((discord_id, steam64))
+    return pairs, errors
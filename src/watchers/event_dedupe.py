@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from adapters.file_manager import atomic_write_async, run_io
+
+logger = logging.getLogger(__name__)
+
+
+def event_key(payload: dict, line: bytes = b"") -> str:
+    player = payload.get("player") or {}
+    steam_id = player.get("steamId")
+    ts = payload.get("ts")
+    if steam_id is not None and ts:
+        return f"{steam_id}|{ts}"
+    return "h:" + hashlib.sha1(line or repr(sorted(payload.items())).encode()).hexdigest()
+
+
+def _append(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(text)
+
+
+class ProcessedEventIndex:
+    """Persistent, bounded set of already-handled event keys.
+
+    Every new key is appended to ``path`` (one ``key<TAB>epoch`` line) before the
+    event is considered handled, so the log cursor can be checkpointed lazily: lines
+    replayed after a crash are recognised and skipped. Keys expire after ``ttl``
+    seconds and the oldest are evicted past ``max_entries``; the file is compacted
+    once it holds more than twice the live keys.
+    """
+
+    def __init__(self, path: Path, ttl: float = 72 * 3600, max_entries: int = 100_000) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._keys: "OrderedDict[str, int]" = OrderedDict()
+        self._file_lines = 0
+        self.duplicates_skipped = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        cutoff = time.time() - self.ttl
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            logger.warning("Failed to read dedupe index", extra={"path": str(self.path)})
+            return
+        for line in lines:
+            key, _, stamp = line.rpartition("\t")
+            try:
+                recorded = int(stamp)
+            except ValueError:
+                continue
+            if key and recorded >= cutoff:
+                self._keys[key] = recorded
+                self._keys.move_to_end(key)
+        self._file_lines = len(lines)
+        self._evict(time.time())
+        logger.info("Dedupe index loaded", extra={"keys": len(self._keys)})
+
+    def seen(self, key: str) -> bool:
+        recorded = self._keys.get(key)
+        if recorded is None:
+            return False
+        if recorded < time.time() - self.ttl:
+            del self._keys[key]
+            return False
+        self.duplicates_skipped += 1
+        return True
+
+    async def add(self, key: str) -> None:
+        now = int(time.time())
+        self._keys[key] = now
+        self._keys.move_to_end(key)
+        self._evict(now)
+        await run_io(self.path, _append, self.path, f"{key}\t{now}\n")
+        self._file_lines += 1
+        if self._file_lines > 1000 and self._file_lines > 2 * len(self._keys):
+            await self.compact()
+
+    async def compact(self) -> None:
+        content = "".join(f"{key}\t{stamp}\n" for key, stamp in self._keys.items())
+        await atomic_write_async(self.path, content)
+        self._file_lines = len(self._keys)
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.ttl
+        while self._keys:
+            key, recorded = next(iter(self._keys.items()))
+            if recorded >= cutoff and len(self._keys) <= self.max_entries:
+                break
+            del self._keys[key]
+
+
+def default_index_path(cache_path: Path) -> Path:
+    return cache_path.with_name(cache_path.stem + ".processed")
+
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_PATTERN = "dl_*.ljson"
+# How often a monitor whose directory disappeared checks whether it is back.
+MISSING_DIR_RETRY_SECONDS = 1.0
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+
+
+class LogDirectoryMonitor:
+    """Keeps the sorted list of ``dl_*.ljson`` names and wakes the tailer on change.
+
+    ``wait`` returns as soon as the watched file grows or the directory listing
+    changes (or after ``timeout``). Changes that land while the caller is busy are
+    latched, so a wake-up is never lost between a tail pass and the next ``wait``.
+    """
+
+    def __init__(self, logs_dir: Path) -> None:
+        self.logs_dir = logs_dir
+        self.active: Optional[str] = None
+        self._files: List[str] = []
+        self._changed = asyncio.Event()
+
+    def start(self) -> None:
+        self.rescan()
+
+    def close(self) -> None:
+        pass
+
+    def files(self) -> List[str]:
+        return list(self._files)
+
+    def watch(self, name: Optional[str]) -> None:
+        self.active = name
+
+    def rescan(self) -> None:
+        try:
+            names = [e.name for e in os.scandir(self.logs_dir) if fnmatch.fnmatch(e.name, LOG_PATTERN)]
+        except OSError:
+            names = []
+        self._files = sorted(names)
+
+    async def wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._changed.clear()
+
+
+class InotifyMonitor(LogDirectoryMonitor):
+    """inotify on the logs directory.
+
+    If the directory itself is deleted or moved away the watch is dropped and
+    ``wait`` keeps trying to re-add it, so a recreated directory is picked up again.
+    A ``wait`` that times out also rescans, in case an event was missed.
+    """
+
+    def __init__(self, logs_dir: Path, libc: ctypes.CDLL) -> None:
+        super().__init__(logs_dir)
+        self._libc = libc
+        self._fd = -1
+        self._wd = -1
+
+    def start(self) -> None:
+        fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        if not self._add_watch():
+            errno = ctypes.get_errno()
+            os.close(fd)
+            self._fd = -1
+            raise OSError(errno, "inotify_add_watch failed", str(self.logs_dir))
+        asyncio.get_running_loop().add_reader(fd, self._on_readable)
+        super().start()
+
+    def _add_watch(self) -> bool:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(self.logs_dir)), _WATCH_MASK)
+        if wd < 0:
+            return False
+        self._wd = wd
+        return True
+
+    def _drop_watch(self) -> None:
+        if self._wd >= 0:
+            # Fails harmlessly when the kernel already removed it with the directory.
+            self._libc.inotify_rm_watch(self._fd, self._wd)
+            self._wd = -1
+
+    async def wait(self, timeout: float) -> None:
+        if self._wd < 0:
+            await self._wait_for_directory(timeout)
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.rescan()
+        self._changed.clear()
+
+    async def _wait_for_directory(self, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self._add_watch():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(MISSING_DIR_RETRY_SECONDS, remaining))
+        else:
+            logger.info("Log directory is back, watching it again", extra={"path": str(self.logs_dir)})
+        self.rescan()
+        self._changed.clear()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = -1
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode("utf-8", "replace")
+            offset += name_len
+            # Leftovers from a watch dropped with the old directory are stale; an
+            # overflow carries wd -1 and always counts.
+            if wd == self._wd or mask & _IN_Q_OVERFLOW:
+                self._apply(mask, name)
+
+    def _apply(self, mask: int, name: str) -> None:
+        if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+            logger.warning("Log directory went away, waiting for it to return", extra={"path": str(self.logs_dir)})
+            self._drop_watch()
+            self.rescan()
+            self._changed.set()
+            return
+        if mask & _IN_Q_OVERFLOW:
+            self.rescan()
+            self._changed.set()
+            return
+        if not fnmatch.fnmatch(name, LOG_PATTERN):
+            return
+        if mask & (_IN_CREATE | _IN_MOVED_TO):
+            index = bisect.bisect_left(self._files, name)
+            if index == len(self._files) or self._files[index] != name:
+                self._files.insert(index, name)
+            self._changed.set()
+        elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+            index = bisect.bisect_left(self._files, name)
+            if index < len(self._files) and self._files[index] == name:
+                del self._files[index]
+            self._changed.set()
+        elif name == self.active or (self._files and name == self._files[-1]):
+            self._changed.set()
+
+
+class PollingMonitor(LogDirectoryMonitor):
+    """Fallback for platforms without inotify.
+
+    Costs two ``stat`` calls per poll: the directory (its mtime changes when files
+    are created, renamed or removed) and the active file. The interval doubles while
+    nothing changes, up to ``max_interval``, and drops back to ``min_interval`` on
+    activity.
+    """
+
+    def __init__(self, logs_dir: Path, min_interval: float = 0.05, max_interval: float = 1.0) -> None:
+        super().__init__(logs_dir)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._dir_mtime = -1
+        self._active_size = -1
+
+    def start(self) -> None:
+        self._dir_mtime = _mtime_ns(self.logs_dir)
+        super().start()
+
+    def watch(self, name: Optional[str]) -> None:
+        if name != self.active:
+            self._active_size = -1
+        super().watch(name)
+
+    def _poll(self) -> bool:
+        changed = False
+        mtime = _mtime_ns(self.logs_dir)
+        if mtime != self._dir_mtime:
+            self._dir_mtime = mtime
+            self.rescan()
+            changed = True
+        if self.active:
+            size = _size(self.logs_dir / self.active)
+            if size != self._active_size:
+                self._active_size = size
+                changed = True
+        return changed
+
+    async def wait(self, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self._changed.is_set():
+            if self._poll():
+                self.interval = self.min_interval
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(self.interval, remaining))
+            self.interval = min(self.interval * 2, self.max_interval)
+        self._changed.clear()
+
+
+def open_log_monitor(logs_dir: Path) -> LogDirectoryMonitor:
+    """Start the best available monitor; must be called from the running event loop."""
+    if sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            monitor: LogDirectoryMonitor = InotifyMonitor(logs_dir, libc)
+            monitor.start()
+            return monitor
+        except (OSError, AttributeError) as exc:
+            # No inotify symbols, watch limit reached, unsupported filesystem, ...
+            logger.warning("inotify unavailable, polling log directory", extra={"error": str(exc)})
+    monitor = PollingMonitor(logs_dir)
+    monitor.start()
+    return monitor
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return -1
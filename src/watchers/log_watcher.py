@@ -1,98 +1,326 @@
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
+import time
 from pathlib import Path
-from typing import Awaitable, Callable, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-from adapters.file_manager import read_json, write_json
+from adapters.file_manager import read_chunk_async, read_json, write_json_async
+from metrics import DEATH_STAGE, PARSED_AT
 from models.cache import CacheState
+from models.user import iso_to_epoch
+from services.player_stats import PlayerStatsStore
+from watchers.event_dedupe import ProcessedEventIndex, default_index_path, event_key
+from watchers.log_discovery import LogDirectoryMonitor, open_log_monitor
 
 logger = logging.getLogger(__name__)
 
-DeathCallback = Callable[[dict], Awaitable[None]]
+DoneCallback = Callable[[bool], Awaitable[None]]
+# Receives a death and a callback to await once its enforcement writes (user DB,
+# ban list) are durable; usually DeathEventPipeline.submit.
+DeathCallback = Callable[[dict, DoneCallback], Awaitable[None]]
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_LINE_BYTES = 1024 * 1024
+# Safety net only: the monitor wakes the tailer as soon as the directory or file changes.
+IDLE_RECHECK_SECONDS = 5.0
+DEATH_TAG = b"PLAYER_DEATH"
 
 
 class LogWatcher:
-    def __init__(self, logs_dir: Path, cache_path: Path, callback: DeathCallback, archive_old: bool = False):
+    def __init__(
+        self,
+        logs_dir: Path,
+        cache_path: Path,
+        callback: DeathCallback,
+        archive_old: bool = False,
+        dedupe: Optional[ProcessedEventIndex] = None,
+        checkpoint_interval: float = 30.0,
+        checkpoint_events: int = 5000,
+        name: str = "default",
+        stats: Optional[PlayerStatsStore] = None,
+    ):
+        self.name = name
+        self.stats = stats
         self.logs_dir = logs_dir
         self.cache_path = cache_path
         self.callback = callback
         self.cache = CacheState.from_dict(read_json(cache_path, {}))
-        self.buffer = ""
+        # Deaths are deduplicated, so the cursor only needs to be persisted now and then:
+        # whatever is replayed after a crash is skipped by the index.
+        self.dedupe = dedupe or ProcessedEventIndex(default_index_path(cache_path))
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_events = checkpoint_events
+        self._events_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        self.checkpoint_count = 0
+        # What the cache file holds, so an idle cursor is not rewritten.
+        self._persisted = self._position(self.cache)
+        self.buffer = bytearray()
+        self.skipping_line = False
         self.archive_old = archive_old
         self.running = False
+        self.monitor: Optional[LogDirectoryMonitor] = None
+        self.bytes_read = 0
+        self.lines_parsed = 0
+        self.catching_up = False
+        self.catchup_lag_bytes = 0
+        self.catchup_bytes_per_sec = 0.0
+        # Deaths handed to the callback but not durably enforced yet: token -> (file, offset of
+        # the line start). Insertion order is log order, so the first entry is the
+        # furthest the persisted cursor may advance.
+        self._inflight: Dict[int, Tuple[str, int]] = {}
+        # Keys of those deaths, so a duplicate line arriving meanwhile is still skipped.
+        self._inflight_keys: Set[str] = set()
+        self._next_token = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def tail_lag_bytes(self) -> int:
+        if self.cache.activeLogFile is None:
+            return 0
+        return max(0, _file_size(self.logs_dir / self.cache.activeLogFile) - self.cache.byteOffset)
+
+    def durable_cursor(self) -> CacheState:
+        """The cursor to persist: never past a death that is still being enforced."""
+        if not self._inflight:
+            return self.cache
+        log_file, offset = next(iter(self._inflight.values()))
+        return CacheState(activeLogFile=log_file, byteOffset=offset, lastSeenTs=self.cache.lastSeenTs)
 
-    def _write_cache(self) -> None:
-        write_json(self.cache_path, self.cache.to_dict())
+    async def checkpoint(self) -> None:
+        await self._write_cache()
 
-    def _latest_log_file(self) -> Optional[Path]:
-        files = sorted(self.logs_dir.glob("dl_*.ljson"))
-        return files[-1] if files else None
+    async def _write_cache(self) -> None:
+        cursor = self.durable_cursor()
+        await write_json_async(self.cache_path, cursor.to_dict())
+        self._persisted = self._position(cursor)
+        self._events_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+        self.checkpoint_count += 1
 
-    def _switch_log_if_needed(self) -> None:
-        latest = self._latest_log_file()
-        if not latest:
+    def _cursor_moved(self) -> bool:
+        return self._position(self.durable_cursor()) != self._persisted
+
+    @staticmethod
+    def _position(cursor: CacheState) -> Tuple[Optional[str], int]:
+        return cursor.activeLogFile, cursor.byteOffset
+
+    async def _maybe_checkpoint(self) -> None:
+        # Any line moves the cursor, deaths or not; the event count only forces an
+        # earlier write under a burst of deaths.
+        if not self._cursor_moved():
             return
-        latest_name = latest.name
-        if self.cache.activeLogFile != latest_name:
-            logger.info("Switching to latest log file", extra={"file": latest_name})
-            self.cache.activeLogFile = latest_name
-            self.cache.byteOffset = 0
-            self.buffer = ""
-            if self.archive_old:
-                for f in self.logs_dir.glob("dl_*.ljson"):
-                    if f.name != latest_name:
-                        try:
-                            f.unlink()
-                        except OSError:
-                            logger.warning("Failed to remove old log", extra={"file": f.name})
+        if (
+            self._events_since_checkpoint >= self.checkpoint_events
+            or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+        ):
+            await self._write_cache()
+
+    def _switch_to(self, name: str) -> None:
+        previous = self.cache.activeLogFile
+        logger.info("Switching log file", extra={"server": self.name, "file": name, "previous": previous})
+        self.cache.activeLogFile = name
+        self.cache.byteOffset = 0
+        self.buffer.clear()
+        self.skipping_line = False
+        if self.archive_old and previous:
+            try:
+                (self.logs_dir / previous).unlink()
+            except OSError:
+                logger.warning("Failed to remove old log", extra={"file": previous})
+
+    async def _finish_file(self, log_path: Path) -> None:
+        # A newer file exists, so whatever is left in this one will never grow: drain it
+        # and treat a trailing line without a newline as complete.
+        await self._tail_file(log_path)
+        if self.buffer and not self.skipping_line:
+            line = bytes(self.buffer)
+            self.buffer.clear()
+            line_start = self.cache.byteOffset
+            self.cache.byteOffset += len(line)
+            await self._process_line(line, line_start)
+        await self._write_cache()
 
     async def run(self) -> None:
         self.running = True
-        while self.running:
-            self._switch_log_if_needed()
-            if not self.cache.activeLogFile:
-                await asyncio.sleep(2)
-                continue
-            log_path = self.logs_dir / self.cache.activeLogFile
-            await self._tail_file(log_path)
-            await asyncio.sleep(1)
+        self.monitor = open_log_monitor(self.logs_dir)
+        try:
+            while self.running:
+                files = self.monitor.files()
+                if not files:
+                    await self.monitor.wait(IDLE_RECHECK_SECONDS)
+                    continue
+                if self.cache.activeLogFile is None:
+                    self._switch_to(files[-1])
+                self.monitor.watch(self.cache.activeLogFile)
+                backlog = [self.logs_dir / name for name in files if name > self.cache.activeLogFile]
+                if backlog:
+                    await self._catch_up(backlog)
+                    continue
+                await self._tail_file(self.logs_dir / self.cache.activeLogFile)
+                await self._maybe_checkpoint()
+                await self.monitor.wait(min(IDLE_RECHECK_SECONDS, self.checkpoint_interval))
+        finally:
+            self.monitor.close()
+            self.monitor = None
+            if self._cursor_moved():
+                await self._write_cache()
+
+    async def _catch_up(self, backlog: List[Path]) -> None:
+        active = self.logs_dir / self.cache.activeLogFile
+        sizes = {f.name: _file_size(f) for f in backlog}
+        total = max(0, _file_size(active) - self.cache.byteOffset) + sum(sizes.values())
+        self.catching_up = True
+        self.catchup_lag_bytes = total
+        started = time.monotonic()
+        read_start = self.bytes_read
+        logger.info("Catching up on log backlog", extra={"server": self.name, "files": len(backlog), "lag_bytes": total})
+        try:
+            await self._finish_file(active)
+            for f in backlog:
+                if not self.running:
+                    return
+                self._switch_to(f.name)
+                if self.monitor:
+                    self.monitor.watch(f.name)
+                # Only the newest file can still be growing; everything before it is final.
+                if f is backlog[-1]:
+                    await self._tail_file(f)
+                else:
+                    await self._finish_file(f)
+                done = self.bytes_read - read_start
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.catchup_lag_bytes = max(0, total - done)
+                self.catchup_bytes_per_sec = done / elapsed
+                logger.info(
+                    "Catch-up progress",
+                    extra={
+                        "server": self.name,
+                        "file": f.name,
+                        "lag_bytes": self.catchup_lag_bytes,
+                        "mb_per_sec": round(self.catchup_bytes_per_sec / 1e6, 2),
+                    },
+                )
+        finally:
+            self.catching_up = False
+        logger.info(
+            "Caught up, switching to live tail",
+            extra={"server": self.name, "bytes": self.bytes_read - read_start, "seconds": round(time.monotonic() - started, 2)},
+        )
 
     async def _tail_file(self, log_path: Path) -> None:
         if not log_path.exists():
             return
+        # byteOffset always points at the start of the first unprocessed line, so
+        # the buffer only ever holds one partial line and a restart never splits one.
+        read_offset = self.cache.byteOffset + len(self.buffer)
         try:
-            with log_path.open("r", encoding="utf-8") as f:
-                f.seek(self.cache.byteOffset)
-                data = f.read()
-                if not data:
-                    return
-                self.cache.byteOffset = f.tell()
+            while True:
+                chunk = await read_chunk_async(log_path, read_offset, READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                read_offset += len(chunk)
+                self.bytes_read += len(chunk)
+                await self._consume_chunk(chunk)
+                # A long file is checkpointed along the way, not only once it is drained.
+                await self._maybe_checkpoint()
         except OSError:
             logger.exception("Failed reading log file", extra={"path": str(log_path)})
+
+    async def _consume_chunk(self, chunk: bytes) -> None:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                break
+            if self.skipping_line:
+                self.cache.byteOffset += newline + 1 - start
+                self.skipping_line = False
+            elif self.buffer:
+                self.buffer += chunk[start:newline]
+                line = bytes(self.buffer)
+                self.buffer.clear()
+                line_start = self.cache.byteOffset
+                self.cache.byteOffset += len(line) + 1
+                await self._process_line(line, line_start)
+            else:
+                line_start = self.cache.byteOffset
+                self.cache.byteOffset += newline + 1 - start
+                await self._process_line(chunk[start:newline], line_start)
+            start = newline + 1
+
+        tail = len(chunk) - start
+        if not tail:
             return
+        if self.skipping_line:
+            self.cache.byteOffset += tail
+        elif len(self.buffer) + tail > MAX_LINE_BYTES:
+            logger.warning("Skipping oversized line", extra={"offset": self.cache.byteOffset})
+            self.cache.byteOffset += len(self.buffer) + tail
+            self.buffer.clear()
+            self.skipping_line = True
+        else:
+            self.buffer += chunk[start:]
 
-        self.buffer += data
-        lines = self.buffer.split("\n")
-        self.buffer = lines.pop()  # last partial line kept
-        for line in lines:
-            if not line.strip():
-                continue
-            try:
-                payload = json.loads(line)
-            except json.JSONDecodeError:
-                logger.warning("Skipping malformed line", extra={"line": line[:80]})
-                continue
-            await self._handle_event(payload)
-        self._write_cache()
-
-    async def _handle_event(self, payload: dict) -> None:
+    async def _process_line(self, line: bytes, line_start: int = 0) -> None:
+        self.lines_parsed += 1
+        # Cheap byte search first: only death lines are worth a UTF-8 decode and json.loads.
+        if DEATH_TAG not in line:
+            return
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            logger.warning("Skipping malformed line", extra={"line": line[:80]})
+            return
+        if isinstance(payload, dict):
+            await self._handle_event(payload, line, line_start)
+
+    async def _handle_event(self, payload: dict, line: bytes = b"", line_start: int = 0) -> None:
         event = payload.get("event")
         if event != "PLAYER_DEATH":
             return
-        await self.callback(payload)
+        key = event_key(payload, line)
+        if key in self._inflight_keys or self.dedupe.seen(key):
+            logger.debug("Skipping already processed event", extra={"key": key})
+            return
         ts = payload.get("ts")
+        payload[PARSED_AT] = time.monotonic()
+        # Replayed backlog would swamp the ingest histogram with hours-old events.
+        logged_at = None if self.catching_up else iso_to_epoch(ts)
+        if logged_at is not None:
+            DEATH_STAGE.observe(max(0.0, time.time() - logged_at), "ingest")
+        token = self._next_token
+        self._next_token += 1
+        self._inflight[token] = (self.cache.activeLogFile, line_start)
+        self._inflight_keys.add(key)
+
+        async def on_done(ok: bool) -> None:
+            # Called only once the DB and ban list hold this death, so the key and the
+            # cursor never get ahead of them and a crash before then replays it. Only
+            # an enforced death is marked processed, so a replay of this stretch of log
+            # retries a failed one. The cursor is released either way: holding it
+            # behind a failure would replay everything after it on every restart.
+            try:
+                if ok:
+                    await self.dedupe.add(key)
+            finally:
+                self._inflight.pop(token, None)
+                self._inflight_keys.discard(key)
+                self._events_since_checkpoint += 1
+
+        await self.callback(payload, on_done)
+        if self.stats is not None:
+            await self.stats.record_event(payload)
         if ts:
             self.cache.lastSeenTs = ts
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0